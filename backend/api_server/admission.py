@@ -0,0 +1,149 @@
+"""Admission control: bounded concurrency and load shedding for the API.
+
+Reads and writes get separate concurrency budgets, so a burst of writers
+queueing on SQLite's single write lock cannot starve cheap reads (and vice
+versa). Requests beyond a budget wait in a bounded queue; when the queue is
+full, or a request has waited longer than the queue timeout, it is shed
+immediately with 503 and Retry-After instead of piling up until clients
+time out.
+"""
+
+import threading
+
+from flask import Flask, g, jsonify, request
+
+READ_METHODS = {"GET", "HEAD"}
+
+
+class ConcurrencyLimiter:
+    """A counting semaphore with a bounded, timed wait queue and metrics."""
+
+    def __init__(self, name: str, max_active: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed. False means shed."""
+        with self._cond:
+            if self.active < self.max_active and self.waiting == 0:
+                self.active += 1
+                self.admitted += 1
+                return True
+
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                return False
+
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            try:
+                admitted = self._cond.wait_for(lambda: self.active < self.max_active, self.queue_timeout)
+            finally:
+                self.waiting -= 1
+
+            if not admitted:
+                self.shed_timeout += 1
+                return False
+
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_active": self.max_active,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "peak_queue_depth": self.peak_waiting,
+                "admitted": self.admitted,
+                "shed": self.shed_queue_full + self.shed_timeout,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_timeout": self.shed_timeout,
+            }
+
+
+class AdmissionController:
+    """Routes each request to the read or write limiter."""
+
+    def __init__(self, config: dict):
+        self.read = ConcurrencyLimiter(
+            "read", config["ADMISSION_MAX_READS"], config["ADMISSION_MAX_QUEUE"], config["ADMISSION_QUEUE_TIMEOUT"]
+        )
+        self.write = ConcurrencyLimiter(
+            "write", config["ADMISSION_MAX_WRITES"], config["ADMISSION_MAX_QUEUE"], config["ADMISSION_QUEUE_TIMEOUT"]
+        )
+        self.exempt_paths = set(config["ADMISSION_EXEMPT_PATHS"])
+
+    def limiter_for(self, method: str, path: str) -> ConcurrencyLimiter | None:
+        if method == "OPTIONS" or path in self.exempt_paths:
+            return None
+        return self.read if method in READ_METHODS else self.write
+
+    def stats(self) -> dict:
+        return {"read": self.read.stats(), "write": self.write.stats()}
+
+
+def init_admission(app: Flask) -> None:
+    """Install the admission controller as before/teardown request hooks.
+
+    Settings (app.config):
+        ADMISSION_ENABLED        turn admission control on/off (default True)
+        ADMISSION_MAX_READS      concurrent GET/HEAD requests
+        ADMISSION_MAX_WRITES     concurrent POST/PUT/PATCH/DELETE requests
+                                 (log writes, login, register, ...)
+        ADMISSION_MAX_QUEUE      requests allowed to wait per budget
+        ADMISSION_QUEUE_TIMEOUT  seconds a queued request waits before 503
+        ADMISSION_RETRY_AFTER    Retry-After value sent with 503, seconds
+        ADMISSION_EXEMPT_PATHS   paths never limited (health, metrics, event stream)
+    """
+    app.config.setdefault("ADMISSION_ENABLED", True)
+    app.config.setdefault("ADMISSION_MAX_READS", 16)
+    app.config.setdefault("ADMISSION_MAX_WRITES", 4)
+    app.config.setdefault("ADMISSION_MAX_QUEUE", 32)
+    app.config.setdefault("ADMISSION_QUEUE_TIMEOUT", 2.0)
+    app.config.setdefault("ADMISSION_RETRY_AFTER", 1)
+    # Event streams stay open indefinitely and would pin a read slot each
+    app.config.setdefault("ADMISSION_EXEMPT_PATHS", ["/api/health", "/api/metrics", "/api/log/stream"])
+
+    if not app.config["ADMISSION_ENABLED"]:
+        return
+
+    controller = AdmissionController(app.config)
+    app.extensions["admission"] = controller
+
+    @app.before_request
+    def admit_request():
+        limiter = controller.limiter_for(request.method, request.path)
+        if limiter is None:
+            return None
+
+        if not limiter.acquire():
+            response = jsonify({"error": "Server busy, please retry"})
+            response.status_code = 503
+            response.headers["Retry-After"] = str(app.config["ADMISSION_RETRY_AFTER"])
+            return response
+
+        g.admission_limiter = limiter
+        return None
+
+    @app.teardown_request
+    def release_slot(exc):
+        limiter = g.pop("admission_limiter", None)
+        if limiter is not None:
+            limiter.release()
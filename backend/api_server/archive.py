@@ -0,0 +1,336 @@
+"""Read and restore meal log days moved to the archive database.
+
+db/archive.py moves days older than a horizon out of user_meal_log into
+meals-archive.db, next to the main database, as one denormalized row per
+user and day (see db/archive-schema.sql). The hot tables and their indexes
+then only hold recent history. Reads that miss the hot tables look here,
+and writes to an archived day move it back with restore_days() first.
+
+The two databases cannot commit together. Moves in either direction copy
+into the destination and commit, then delete from the source under the
+main database's write lock, so a day is never missing from both. An
+interrupted move can leave a day in both; the hot copy is the current one
+and every reader prefers it, and the next move of that day cleans up.
+
+Archived days keep the food names and calories they had when archived.
+In-memory databases have no archive.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import database
+from database import dict_factory, get_db
+
+
+def get_archive_path() -> Path | None:
+    """The archive file for the configured database, e.g. meals-archive.db."""
+    if database.is_memory_database():
+        return None
+    path = database.DATABASE_PATH
+    return path.with_name(f"{path.stem}-archive{path.suffix}")
+
+
+def get_archive_db() -> sqlite3.Connection | None:
+    """Open the archive database, or None if nothing was ever archived."""
+    path = get_archive_path()
+    if path is None or not path.exists():
+        return None
+    conn = sqlite3.connect(path)
+    conn.row_factory = dict_factory
+    return conn
+
+
+def get_archived_day(user_id: int, date_str: str) -> list[dict]:
+    """Get an archived day's entries with their items ([] if not archived)."""
+    conn = get_archive_db()
+    if conn is None:
+        return []
+    try:
+        row = conn.execute(
+            "SELECT entries FROM archived_days WHERE user_id = ? AND meal_date = ?",
+            (user_id, date_str)
+        ).fetchone()
+    finally:
+        conn.close()
+    return json.loads(row["entries"]) if row else []
+
+
+def get_archived_entry(log_id: int) -> dict | None:
+    """Get one archived entry by its original log id, with user_id and meal_date."""
+    conn = get_archive_db()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            """
+            SELECT d.user_id, d.meal_date, d.entries
+            FROM archived_log_ids a
+            JOIN archived_days d ON d.user_id = a.user_id AND d.meal_date = a.meal_date
+            WHERE a.log_id = ?
+            """,
+            (log_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+
+    if not row:
+        return None
+
+    for entry in json.loads(row["entries"]):
+        if entry["id"] == log_id:
+            entry["user_id"] = row["user_id"]
+            entry["meal_date"] = row["meal_date"]
+            return entry
+    return None
+
+
+def get_archived_entries(user_id: int, log_ids: list[int]) -> list[dict]:
+    """Get archived entries by original log id, shaped like get_log_entries_with_items()."""
+    if not log_ids:
+        return []
+    conn = get_archive_db()
+    if conn is None:
+        return []
+    try:
+        days = conn.execute(
+            """
+            SELECT meal_date, entries FROM archived_days
+            WHERE user_id = ? AND meal_date IN (
+                SELECT meal_date FROM archived_log_ids
+                WHERE log_id IN (SELECT value FROM json_each(?))
+            )
+            ORDER BY meal_date
+            """,
+            (user_id, json.dumps(log_ids))
+        ).fetchall()
+    finally:
+        conn.close()
+
+    wanted = set(log_ids)
+    entries = []
+    for day in days:
+        for entry in sorted(json.loads(day["entries"]), key=lambda e: e["id"]):
+            if entry["id"] in wanted:
+                entries.append({
+                    "id": entry["id"],
+                    "meal_date": day["meal_date"],
+                    "meal_type": entry["meal_type"],
+                    "meal_id": entry["meal_id"],
+                    "meal_name": entry["meal_name"],
+                    "items": entry["items"],
+                    "total_calories": sum(i["calories"] * i["quantity"] for i in entry["items"]),
+                })
+    return entries
+
+
+def get_archived_dates(user_id: int, after: str | None = None, limit: int = -1) -> list[str]:
+    """Get archived dates in ascending order, optionally after a date."""
+    conn = get_archive_db()
+    if conn is None:
+        return []
+    try:
+        rows = conn.execute(
+            """
+            SELECT meal_date FROM archived_days
+            WHERE user_id = ? AND meal_date > ?
+            ORDER BY meal_date
+            LIMIT ?
+            """,
+            (user_id, after or "", limit)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row["meal_date"] for row in rows]
+
+
+def get_archived_dates_among(user_id: int, dates: list[str]) -> set[str]:
+    """Which of the given dates are archived for the user."""
+    conn = get_archive_db()
+    if conn is None:
+        return set()
+    try:
+        rows = conn.execute(
+            """
+            SELECT meal_date FROM archived_days
+            WHERE user_id = ? AND meal_date IN (SELECT value FROM json_each(?))
+            """,
+            (user_id, json.dumps(dates))
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row["meal_date"] for row in rows}
+
+
+def get_archived_dates_between(user_id: int, start: str, end: str) -> list[str]:
+    """Get archived dates from start to end (inclusive) in ascending order."""
+    conn = get_archive_db()
+    if conn is None:
+        return []
+    try:
+        rows = conn.execute(
+            """
+            SELECT meal_date FROM archived_days
+            WHERE user_id = ? AND meal_date BETWEEN ? AND ?
+            ORDER BY meal_date
+            """,
+            (user_id, start, end)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row["meal_date"] for row in rows]
+
+
+def iter_archived_rows(user_id: int, skip_dates: set[str] = frozenset()):
+    """Yield archived entries as export rows (one per item or empty entry).
+
+    Days in skip_dates (those also in the hot tables) are left out.
+    """
+    conn = get_archive_db()
+    if conn is None:
+        return
+    try:
+        cursor = conn.execute(
+            "SELECT meal_date, entries FROM archived_days WHERE user_id = ? ORDER BY meal_date",
+            (user_id,)
+        )
+        for day in cursor:
+            if day["meal_date"] in skip_dates:
+                continue
+            for entry in sorted(json.loads(day["entries"]), key=lambda e: e["id"]):
+                row = {
+                    "log_id": entry["id"],
+                    "meal_date": day["meal_date"],
+                    "meal_type": entry["meal_type"],
+                    "meal_id": entry["meal_id"],
+                    "meal_name": entry["meal_name"],
+                }
+                if not entry["items"]:
+                    yield {**row, "item_id": None, "food_id": None, "food_name": None,
+                           "calories": None, "quantity": None}
+                for item in entry["items"]:
+                    yield {
+                        **row,
+                        "item_id": item["id"],
+                        "food_id": item["food_id"],
+                        "food_name": item["food_name"],
+                        "calories": item["calories"],
+                        "quantity": item["quantity"],
+                    }
+    finally:
+        conn.close()
+
+
+def restore_days(user_id: int, dates: list[str]) -> list[str]:
+    """Move archived days back into the hot tables; returns the dates moved.
+
+    Entries and items keep their original ids. A meal template deleted in
+    the meantime is dropped from the entry, and so are items of foods that
+    no longer exist. The days are inserted and committed first. The
+    archived copies are then deleted under the main database's write lock,
+    and only where the hot copy is still there, since db/archive.py could
+    have moved a day out again in between.
+    """
+    if not dates:
+        return []
+
+    archive = get_archive_db()
+    if archive is None:
+        return []
+
+    dates_json = json.dumps(dates)
+    try:
+        # Most writes are to days that were never archived; find that out
+        # before waiting for the write lock
+        if not get_archived_days(archive, user_id, dates_json):
+            return []
+
+        conn = get_db()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Read again under the lock, another request may have restored them
+            days = get_archived_days(archive, user_id, dates_json)
+            if not days:
+                conn.rollback()
+                return []
+
+            hot_dates = get_hot_dates(conn, user_id, dates_json)
+            for day in days:
+                # Already copied by an interrupted restore; the hot copy wins
+                if day["meal_date"] in hot_dates:
+                    continue
+                for entry in json.loads(day["entries"]):
+                    conn.execute(
+                        """
+                        INSERT INTO user_meal_log (id, user_id, meal_date, meal_type, meal_id, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, (SELECT id FROM meals WHERE id = ?), ?, ?)
+                        """,
+                        (entry["id"], user_id, day["meal_date"], entry["meal_type"], entry["meal_id"],
+                         entry["created_at"], entry["updated_at"])
+                    )
+                    conn.executemany(
+                        """
+                        INSERT INTO user_meal_log_items (id, log_id, food_id, quantity)
+                        SELECT ?, ?, id, ? FROM foods WHERE id = ?
+                        """,
+                        [(item["id"], entry["id"], item["quantity"], item["food_id"]) for item in entry["items"]]
+                    )
+            conn.commit()
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                restored = sorted(get_hot_dates(conn, user_id, dates_json) & {day["meal_date"] for day in days})
+                delete_archived_days(archive, user_id, restored)
+                archive.commit()
+            finally:
+                conn.rollback()
+        finally:
+            conn.close()
+    finally:
+        archive.close()
+
+    return restored
+
+
+def get_archived_days(archive: sqlite3.Connection, user_id: int, dates_json: str) -> list[dict]:
+    """The archived_days rows of the dates (a JSON array) that are archived."""
+    return archive.execute(
+        """
+        SELECT meal_date, entries FROM archived_days
+        WHERE user_id = ? AND meal_date IN (SELECT value FROM json_each(?))
+        """,
+        (user_id, dates_json)
+    ).fetchall()
+
+
+def get_hot_dates(conn: sqlite3.Connection, user_id: int, dates_json: str) -> set[str]:
+    """Which of the dates (a JSON array) have entries in the hot tables."""
+    rows = conn.execute(
+        """
+        SELECT DISTINCT meal_date FROM user_meal_log
+        WHERE user_id = ? AND meal_date IN (SELECT value FROM json_each(?))
+        """,
+        (user_id, dates_json)
+    ).fetchall()
+    return {row["meal_date"] for row in rows}
+
+
+def delete_archived_days(archive: sqlite3.Connection, user_id: int, dates: list[str]) -> None:
+    """Delete archived days and their entry ids; the caller commits."""
+    days = archive.execute(
+        """
+        SELECT entries FROM archived_days
+        WHERE user_id = ? AND meal_date IN (SELECT value FROM json_each(?))
+        """,
+        (user_id, json.dumps(dates))
+    ).fetchall()
+    log_ids = [entry["id"] for day in days for entry in json.loads(day["entries"])]
+    archive.execute(
+        "DELETE FROM archived_log_ids WHERE log_id IN (SELECT value FROM json_each(?))",
+        (json.dumps(log_ids),)
+    )
+    archive.execute(
+        "DELETE FROM archived_days WHERE user_id = ? AND meal_date IN (SELECT value FROM json_each(?))",
+        (user_id, json.dumps(dates))
+    )
@@ -1,23 +1,180 @@
+import base64
+import hmac
+import json
+import logging
+import os
 import secrets
 import hashlib
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from functools import wraps
 
-from flask import request, jsonify, g
+from flask import Flask, current_app, request, jsonify, g
+
+from database import get_db, query_db, execute_db
+
+logger = logging.getLogger(__name__)
+
+SESSION_MODES = ("db", "signed")
+SESSION_SECRET_ENV = "MEAL_TRACKER_SESSION_SECRET"
+SIGNED_TOKEN_VERSION = "v1"
+
+# Revocation generations keyed by user id, stored as (generation, loaded_at)
+_generations: dict[int, tuple[int, float]] = {}
+_generations_lock = threading.Lock()
+
+
+def init_sessions(app: Flask) -> None:
+    """Configure how session tokens are issued.
+
+    Settings (app.config):
+        SESSION_MODE            "db" stores a row per session (default);
+                                "signed" issues HMAC-signed tokens that are
+                                verified without a database lookup
+        SESSION_SECRET          signing key, defaults to the
+                                MEAL_TRACKER_SESSION_SECRET environment variable
+        SESSION_GENERATION_TTL  seconds a cached revocation generation is
+                                trusted, which bounds how long a logout handled
+                                by another process takes to apply here
+    """
+    app.config.setdefault("SESSION_MODE", "db")
+    app.config.setdefault("SESSION_SECRET", os.environ.get(SESSION_SECRET_ENV))
+    app.config.setdefault("SESSION_GENERATION_TTL", 60)
+
+    if app.config["SESSION_MODE"] not in SESSION_MODES:
+        raise ValueError(f"SESSION_MODE must be one of: {', '.join(SESSION_MODES)}")
+
+    secret = app.config["SESSION_SECRET"]
+    if app.config["SESSION_MODE"] == "signed" and not secret:
+        logger.warning(
+            f"{SESSION_SECRET_ENV} is not set; using a random session secret, "
+            "so signed sessions will not survive a restart"
+        )
+        secret = secrets.token_bytes(32)
+    if isinstance(secret, str):
+        secret = secret.encode()
+    app.config["SESSION_SECRET"] = secret
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(message: str) -> str:
+    secret = current_app.config["SESSION_SECRET"]
+    return _b64encode(hmac.new(secret, message.encode(), hashlib.sha256).digest())
+
+
+def get_session_generation(user_id: int) -> int:
+    """Get a user's revocation generation, cached for SESSION_GENERATION_TTL."""
+    now = time.monotonic()
+    with _generations_lock:
+        cached = _generations.get(user_id)
+    if cached and now - cached[1] < current_app.config["SESSION_GENERATION_TTL"]:
+        return cached[0]
+
+    row = query_db("SELECT session_generation FROM users WHERE id = ?", (user_id,), one=True)
+    # A deleted user matches no token
+    generation = row["session_generation"] if row else -1
+
+    with _generations_lock:
+        cached = _generations.get(user_id)
+        # Generations only grow. A revoke that ran while this read was in
+        # flight stored a newer one, which this older read must not replace.
+        if row and cached and cached[0] > generation:
+            return cached[0]
+        _generations[user_id] = (generation, now)
+    return generation
+
+
+def revoke_signed_sessions(user_id: int) -> None:
+    """Invalidate every signed token issued to a user so far, on every device.
+
+    The new generation goes straight into the cache, so this process
+    rejects the old tokens at once; other processes notice within
+    SESSION_GENERATION_TTL.
+    """
+    conn = get_db()
+    try:
+        row = conn.execute(
+            """
+            UPDATE users SET session_generation = session_generation + 1 WHERE id = ?
+            RETURNING session_generation
+            """,
+            (user_id,)
+        ).fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+
+    with _generations_lock:
+        if row:
+            _generations[user_id] = (row["session_generation"], time.monotonic())
+        else:
+            _generations.pop(user_id, None)
+
+
+def create_signed_token(user_id: int, username: str, expires_at: datetime) -> str:
+    """Create a stateless token carrying the user, expiry and generation."""
+    payload = json.dumps({
+        "uid": user_id,
+        "name": username,
+        "exp": int(expires_at.timestamp()),
+        "gen": get_session_generation(user_id),
+    }, separators=(",", ":"))
+    message = f"{SIGNED_TOKEN_VERSION}.{_b64encode(payload.encode())}"
+    return f"{message}.{_sign(message)}"
+
+
+def validate_signed_token(token: str) -> dict | None:
+    """Verify a signed token without touching the database (once cached)."""
+    if not current_app.config.get("SESSION_SECRET"):
+        return None
 
-from database import query_db, execute_db
+    version, body, signature = token.split(".")
+    if version != SIGNED_TOKEN_VERSION:
+        return None
 
+    if not hmac.compare_digest(signature.encode(), _sign(f"{version}.{body}").encode()):
+        return None
 
-def create_session_token(user_id: int, remember_me: bool = False) -> str:
-    """Create a session token and store it in the database."""
-    token = secrets.token_urlsafe(32)
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    # The signature matched, so the payload is one this server issued
+    payload = json.loads(_b64decode(body))
+
+    if time.time() > payload["exp"]:
+        return None
+
+    if payload["gen"] != get_session_generation(payload["uid"]):
+        return None
+
+    return {"id": payload["uid"], "username": payload["name"]}
 
+
+def is_signed_token(token: str) -> bool:
+    """DB tokens are plain urlsafe strings; signed ones have three parts."""
+    return token.count(".") == 2
+
+
+def create_session_token(user_id: int, remember_me: bool = False, username: str | None = None) -> str:
+    """Create a session token, stored in the database or signed per SESSION_MODE."""
     if remember_me:
         expires_at = datetime.now(timezone.utc) + timedelta(days=30)
     else:
         expires_at = datetime.now(timezone.utc) + timedelta(hours=24)
 
+    if current_app.config.get("SESSION_MODE") == "signed":
+        if username is None:
+            username = query_db("SELECT username FROM users WHERE id = ?", (user_id,), one=True)["username"]
+        return create_signed_token(user_id, username, expires_at)
+
+    token = secrets.token_urlsafe(32)
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+
     execute_db(
         "INSERT INTO sessions (user_id, token, expires_at) VALUES (?, ?, ?)",
         (user_id, token_hash, expires_at.isoformat())
@@ -28,6 +185,10 @@ def create_session_token(user_id: int, remember_me: bool = False) -> str:
 
 def validate_session_token(token: str) -> dict | None:
     """Validate a session token and return user info if valid."""
+    # Tokens of either kind stay valid when SESSION_MODE changes
+    if is_signed_token(token):
+        return validate_signed_token(token)
+
     token_hash = hashlib.sha256(token.encode()).hexdigest()
 
     session = query_db(
@@ -56,7 +217,18 @@ def validate_session_token(token: str) -> dict | None:
 
 
 def invalidate_session_token(token: str) -> bool:
-    """Invalidate a session token."""
+    """Invalidate a session token.
+
+    A signed token cannot be deleted, so logging one out bumps the user's
+    generation, which revokes all of that user's signed sessions: logout
+    signs the user out on every device, not just this one.
+    """
+    if is_signed_token(token):
+        user = validate_signed_token(token)
+        if user:
+            revoke_signed_sessions(user["id"])
+        return True
+
     token_hash = hashlib.sha256(token.encode()).hexdigest()
     execute_db("DELETE FROM sessions WHERE token = ?", (token_hash,))
     return True
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Online database backups using the SQLite backup API.
+
+Pages are copied in steps of a configurable size with a short sleep in
+between, so a backup never holds the database for long. The database runs
+in WAL mode, so the backup's reads do not block POST /api/log writers.
+Snapshots are written to timestamped files (optionally gzipped) and old
+snapshots beyond the retention count are deleted.
+
+Run directly for a one-off backup, or pass --backup-dir/--backup-interval
+to the API server for scheduled ones.
+"""
+
+import argparse
+import gzip
+import logging
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGES = 512
+DEFAULT_SLEEP = 0.05
+DEFAULT_KEEP = 7
+# After this many restarts caused by concurrent writes, finish in one step
+MAX_RESTARTS = 3
+
+# Outcome of the most recent backup, reported by /api/metrics
+last_backup: dict | None = None
+
+
+class TooManyRestarts(Exception):
+    """Raised from the progress callback to abandon a stepped backup."""
+
+
+def list_snapshots(dest_dir: Path) -> list[Path]:
+    """Snapshots of the configured database in dest_dir, newest first.
+
+    Only finished .db and .db.gz files count, not the journal of a backup
+    still being written.
+    """
+    stem = database.DATABASE_PATH.stem
+    return sorted(
+        (path for suffix in (".db", ".db.gz") for path in dest_dir.glob(f"{stem}-[0-9]*Z{suffix}")),
+        reverse=True
+    )
+
+
+def prune_backups(dest_dir: Path, keep: int) -> list[Path]:
+    """Delete all but the `keep` newest snapshots in dest_dir."""
+    snapshots = list_snapshots(dest_dir)
+    removed = snapshots[keep:] if keep > 0 else []
+    for path in removed:
+        path.unlink()
+        logger.info(f"Backup: removed old snapshot {path.name}")
+    return removed
+
+
+def backup_database(
+    dest_dir: Path,
+    pages: int = DEFAULT_PAGES,
+    sleep: float = DEFAULT_SLEEP,
+    compress: bool = False,
+    keep: int = DEFAULT_KEEP,
+) -> dict:
+    """Copy the live database to a timestamped snapshot and return a summary."""
+    global last_backup
+
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    target = dest_dir / f"{database.DATABASE_PATH.stem}-{timestamp}.db"
+
+    started = time.monotonic()
+    last_report = started
+    steps = 0
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal steps, restarts, last_remaining, last_report
+        steps += 1
+        # Writes from another connection make SQLite restart the copy
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise TooManyRestarts()
+        last_remaining = remaining
+        now = time.monotonic()
+        if now - last_report >= 1:
+            logger.info(f"Backup: {total - remaining}/{total} pages copied")
+            last_report = now
+        # backup()'s own sleep only applies when a step hits a lock, so
+        # pause here to spread the copy out between steps
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    src = database.get_db()
+    dst = sqlite3.connect(target)
+    try:
+        try:
+            src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+        except TooManyRestarts:
+            # A busy writer keeps invalidating the stepped copy. In WAL mode a
+            # single-step copy reads one consistent snapshot without blocking
+            # writers, so finish that way instead of retrying forever.
+            logger.info(f"Backup: {restarts} restarts from concurrent writes, copying in one step")
+            src.backup(dst, pages=-1)
+    finally:
+        dst.close()
+        src.close()
+
+    path = target
+    if compress:
+        path = target.with_name(target.name + ".gz")
+        with open(target, "rb") as f_in, gzip.open(path, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        target.unlink()
+
+    summary = {
+        "path": str(path),
+        "size": path.stat().st_size,
+        "steps": steps,
+        "restarts": restarts,
+        "seconds": round(time.monotonic() - started, 3),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+    }
+    logger.info(
+        f"Backup: wrote {path.name} ({summary['size']} bytes, {steps} steps, "
+        f"{restarts} restarts) in {summary['seconds']}s"
+    )
+
+    prune_backups(dest_dir, keep)
+    last_backup = summary
+    return summary
+
+
+def start_backup_scheduler(dest_dir: Path, interval: float, **options) -> threading.Event:
+    """Run backup_database every `interval` seconds on a daemon thread.
+
+    The first backup runs once the newest snapshot in dest_dir is
+    `interval` old, right away if there is none, so a server restarted
+    more often than the interval still takes backups. Returns an Event
+    that stops the scheduler when set.
+    """
+    stop = threading.Event()
+    snapshots = list_snapshots(dest_dir) if dest_dir.exists() else []
+    age = time.time() - snapshots[0].stat().st_mtime if snapshots else interval
+    first_delay = max(0.0, interval - age)
+
+    def run():
+        delay = first_delay
+        while not stop.wait(delay):
+            delay = interval
+            try:
+                backup_database(dest_dir, **options)
+            except Exception:
+                logger.exception("Backup: scheduled backup failed")
+
+    threading.Thread(target=run, name="backup-scheduler", daemon=True).start()
+    logger.info(f"Backup: scheduled every {interval:.0f}s to {dest_dir}, next in {first_delay:.0f}s")
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up the meals database while the server is running")
+    parser.add_argument("dest", type=Path, help="Directory to write the snapshot to")
+    parser.add_argument("--pages", type=int, default=DEFAULT_PAGES, help=f"Pages copied per step (default: {DEFAULT_PAGES})")
+    parser.add_argument("--sleep", type=float, default=DEFAULT_SLEEP, help=f"Seconds to sleep between steps (default: {DEFAULT_SLEEP})")
+    parser.add_argument("--compress", action="store_true", help="gzip the snapshot")
+    parser.add_argument("--db", help=f"Database file or file: URI to back up (default: ${database.DATABASE_ENV} or db/meals.db)")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help=f"Snapshots to retain, 0 keeps all (default: {DEFAULT_KEEP})")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    if args.db:
+        database.configure_database(args.db)
+
+    if not database.DATABASE_PATH.exists():
+        print(f"Error: Database not found at {database.DATABASE_PATH}", file=sys.stderr)
+        sys.exit(1)
+
+    summary = backup_database(args.dest, args.pages, args.sleep, args.compress, args.keep)
+    print(summary["path"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Small thread-safe LRU cache for in-process response caching."""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Least-recently-used mapping with a fixed maximum number of entries."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._data[key]
+
+    def __contains__(self, key) -> bool:
+        """Membership test that neither counts as a hit or miss nor refreshes the entry."""
+        with self._lock:
+            return key in self._data
+
+    def peek(self, key, default=None):
+        """Get an entry without counting it or marking it recently used."""
+        with self._lock:
+            return self._data.get(key, default)
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
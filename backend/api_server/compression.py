@@ -0,0 +1,135 @@
+"""Content-negotiated response compression (gzip, and brotli when installed)."""
+
+import zlib
+
+from flask import Flask, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+}
+
+# Size of the chunks a large buffered body is compressed in when streamed.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def available_encodings() -> list[str]:
+    """Return supported content codings in order of server preference."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def is_compressible(mimetype: str | None) -> bool:
+    """Check whether a response mimetype is worth compressing."""
+    if not mimetype or mimetype == "text/event-stream":
+        return False
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def _to_bytes(chunk) -> bytes:
+    return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def compress_bytes(data: bytes, encoding: str, level: int) -> bytes:
+    """Compress a complete body in one shot."""
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding: str, level: int):
+    """Compress an iterable of body chunks, flushing after every chunk.
+
+    Flushing keeps streamed responses (exports, large lists) flowing to the
+    client as they are produced instead of waiting for the compressor's
+    internal buffer to fill.
+    """
+    try:
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=level)
+            for chunk in chunks:
+                out = compressor.process(_to_bytes(chunk)) + compressor.flush()
+                if out:
+                    yield out
+            yield compressor.finish()
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            for chunk in chunks:
+                out = compressor.compress(_to_bytes(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if out:
+                    yield out
+            yield compressor.flush()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def _split(data: bytes, size: int):
+    view = memoryview(data)
+    for start in range(0, len(view), size):
+        yield view[start:start + size].tobytes()
+
+
+def init_compression(app: Flask) -> None:
+    """Register an after_request hook that compresses eligible responses.
+
+    Settings (app.config):
+        COMPRESS_ENABLED          turn compression on/off (default True)
+        COMPRESS_MIN_SIZE         bodies smaller than this are sent as-is
+        COMPRESS_LEVEL            gzip level, 1-9
+        COMPRESS_BR_LEVEL         brotli quality, 0-11
+        COMPRESS_STREAM_THRESHOLD buffered bodies larger than this are
+                                  compressed and sent in chunks
+    """
+    app.config.setdefault("COMPRESS_ENABLED", True)
+    app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    app.config.setdefault("COMPRESS_BR_LEVEL", 4)
+    app.config.setdefault("COMPRESS_STREAM_THRESHOLD", 1024 * 1024)
+
+    @app.after_request
+    def compress_response(response):
+        config = app.config
+        if not config["COMPRESS_ENABLED"]:
+            return response
+
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or not is_compressible(response.mimetype)
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+
+        level = config["COMPRESS_BR_LEVEL"] if encoding == "br" else config["COMPRESS_LEVEL"]
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, level)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < config["COMPRESS_MIN_SIZE"]:
+                return response
+
+            if len(data) > config["COMPRESS_STREAM_THRESHOLD"]:
+                response.response = compress_stream(_split(data, STREAM_CHUNK_SIZE), encoding, level)
+                response.headers.pop("Content-Length", None)
+            else:
+                response.set_data(compress_bytes(data, encoding, level))
+
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -1,39 +1,269 @@
+import itertools
 import sqlite3
 import os
 from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+DATABASE_ENV = "MEAL_TRACKER_DB"
+MEMORY_DATABASE = ":memory:"
 
 DATABASE_PATH = Path(__file__).parent.parent.parent / "db" / "meals.db"
 SCHEMA_PATH = Path(__file__).parent.parent.parent / "db" / "schema.sql"
+# SQLite URI opened instead of DATABASE_PATH when set (file: URIs, in-memory)
+DATABASE_URI: str | None = None
+
+# An open connection keeps the in-memory database alive
+_memory_anchor: sqlite3.Connection | None = None
+_memory_ids = itertools.count(1)
+
+# Upgrade scripts for databases created from an older schema.sql. Entry N
+# takes a database from user_version N to N + 1. schema.sql always describes
+# the latest version, so fresh databases skip these entirely.
+MIGRATIONS = [
+    # 1: change log for delta sync, seeded with every existing entry
+    """
+    CREATE TABLE user_meal_log_changes (
+        id              INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id         INTEGER NOT NULL,
+        log_id          INTEGER NOT NULL,
+        meal_date       TEXT NOT NULL,
+        meal_type       TEXT NOT NULL,
+        op              TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+        changed_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now'))
+    );
+
+    CREATE INDEX idx_user_meal_log_changes_user_id ON user_meal_log_changes(user_id, id);
+
+    INSERT INTO user_meal_log_changes (user_id, log_id, meal_date, meal_type, op)
+    SELECT user_id, id, meal_date, meal_type, 'upsert' FROM user_meal_log ORDER BY id;
+
+    CREATE TRIGGER user_meal_log_insert_change AFTER INSERT ON user_meal_log
+    BEGIN
+        INSERT INTO user_meal_log_changes (user_id, log_id, meal_date, meal_type, op)
+        VALUES (NEW.user_id, NEW.id, NEW.meal_date, NEW.meal_type, 'upsert');
+    END;
+
+    CREATE TRIGGER user_meal_log_update_change AFTER UPDATE ON user_meal_log
+    BEGIN
+        INSERT INTO user_meal_log_changes (user_id, log_id, meal_date, meal_type, op)
+        VALUES (NEW.user_id, NEW.id, NEW.meal_date, NEW.meal_type, 'upsert');
+    END;
+
+    CREATE TRIGGER user_meal_log_delete_change AFTER DELETE ON user_meal_log
+    BEGIN
+        INSERT INTO user_meal_log_changes (user_id, log_id, meal_date, meal_type, op)
+        VALUES (OLD.user_id, OLD.id, OLD.meal_date, OLD.meal_type, 'delete');
+    END;
+    """,
+    # 2: denormalized meal totals, kept current when food calories change
+    """
+    ALTER TABLE meals ADD COLUMN total_calories REAL NOT NULL DEFAULT 0;
+    ALTER TABLE meals ADD COLUMN item_count INTEGER NOT NULL DEFAULT 0;
+
+    CREATE INDEX idx_meals_total_calories ON meals(total_calories, name);
+
+    UPDATE meals SET
+        total_calories = COALESCE((
+            SELECT SUM(f.calories * mi.quantity)
+            FROM meal_items mi
+            JOIN foods f ON f.id = mi.food_id
+            WHERE mi.meal_id = meals.id
+        ), 0),
+        item_count = (SELECT COUNT(*) FROM meal_items mi WHERE mi.meal_id = meals.id);
+
+    CREATE TRIGGER foods_calories_update AFTER UPDATE OF calories ON foods
+    BEGIN
+        UPDATE meals SET total_calories = COALESCE((
+            SELECT SUM(f.calories * mi.quantity)
+            FROM meal_items mi
+            JOIN foods f ON f.id = mi.food_id
+            WHERE mi.meal_id = meals.id
+        ), 0)
+        WHERE id IN (SELECT meal_id FROM meal_items WHERE food_id = NEW.id);
+    END;
+    """,
+    # 3: per-day change versions for daily log ETags
+    """
+    CREATE INDEX idx_user_meal_log_changes_user_date ON user_meal_log_changes(user_id, meal_date, id);
+    """,
+    # 4: per-user generation for revoking signed session tokens
+    """
+    ALTER TABLE users ADD COLUMN session_generation INTEGER NOT NULL DEFAULT 0;
+    """,
+    # 5: catalog change counter, so caches notice edits made by other processes
+    """
+    CREATE TABLE catalog_versions (
+        name            TEXT PRIMARY KEY,
+        version         INTEGER NOT NULL DEFAULT 0
+    );
+
+    INSERT INTO catalog_versions (name) VALUES ('foods');
+
+    CREATE TRIGGER foods_insert_version AFTER INSERT ON foods
+    BEGIN
+        UPDATE catalog_versions SET version = version + 1 WHERE name = 'foods';
+    END;
+
+    CREATE TRIGGER foods_update_version AFTER UPDATE OF name, calories ON foods
+    BEGIN
+        UPDATE catalog_versions SET version = version + 1 WHERE name = 'foods';
+    END;
+
+    CREATE TRIGGER foods_delete_version AFTER DELETE ON foods
+    BEGIN
+        UPDATE catalog_versions SET version = version + 1 WHERE name = 'foods';
+    END;
+    """,
+    # 6: meals change counter, for daily log ETags that show meal names.
+    # No insert trigger: a new meal changes no existing day, and one would
+    # make every insert plan the foreign key lookup on user_meal_log.
+    """
+    CREATE TRIGGER meals_update_version AFTER UPDATE ON meals
+    BEGIN
+        UPDATE catalog_versions SET version = version + 1 WHERE name = 'meals';
+    END;
+
+    CREATE TRIGGER meals_delete_version AFTER DELETE ON meals
+    BEGIN
+        UPDATE catalog_versions SET version = version + 1 WHERE name = 'meals';
+    END;
+
+    INSERT INTO catalog_versions (name) VALUES ('meals');
+    """,
+    # 7: per-row versions for daily log ETags, so a day's ETag only moves
+    # when a food or meal it shows is edited. The catalog-wide counters
+    # moved on every catalog write (meal totals included) and invalidated
+    # every day; only the foods one stays, for the food index.
+    """
+    ALTER TABLE foods ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE meals ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+
+    DROP TRIGGER meals_update_version;
+    DROP TRIGGER meals_delete_version;
+    DELETE FROM catalog_versions WHERE name = 'meals';
+
+    CREATE TRIGGER foods_row_version AFTER UPDATE OF name, calories ON foods
+    BEGIN
+        UPDATE foods SET version = version + 1 WHERE id = NEW.id;
+    END;
+
+    CREATE TRIGGER meals_row_version AFTER UPDATE OF name ON meals
+    BEGIN
+        UPDATE meals SET version = version + 1 WHERE id = NEW.id;
+    END;
+    """,
+]
+
+
+def dict_factory(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    """Row factory that builds plain dicts, ready to serialize without a copy."""
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+def configure_database(target: str | Path) -> None:
+    """Point the server at a database file, a file: URI, or ":memory:".
+
+    ":memory:" selects a fresh in-memory database, private to this process,
+    which init_db creates from schema.sql. It lives until the process exits
+    or the database is reconfigured. It uses SQLite's memdb VFS (3.36+)
+    rather than cache=shared, so concurrent requests wait on the usual busy
+    timeout instead of failing with "database table is locked".
+    """
+    global DATABASE_PATH, DATABASE_URI, _memory_anchor
+
+    if _memory_anchor is not None:
+        _memory_anchor.close()
+        _memory_anchor = None
+
+    target = str(target)
+    if target == MEMORY_DATABASE:
+        name = f"meals-memory-{os.getpid()}-{next(_memory_ids)}"
+        DATABASE_URI = f"file:/{name}?vfs=memdb"
+        DATABASE_PATH = Path(f"{name}.db")
+    elif target.startswith("file:"):
+        DATABASE_URI = target
+        DATABASE_PATH = Path(unquote(urlsplit(target).path))
+    else:
+        DATABASE_URI = None
+        DATABASE_PATH = Path(target)
+
+
+def is_memory_database() -> bool:
+    return DATABASE_URI is not None and "vfs=memdb" in DATABASE_URI
 
 
 def get_db() -> sqlite3.Connection:
     """Get a database connection with row factory enabled."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    if DATABASE_URI:
+        conn = sqlite3.connect(DATABASE_URI, uri=True)
+    else:
+        conn = sqlite3.connect(DATABASE_PATH)
+    conn.row_factory = dict_factory
     conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 
 def init_db():
-    """Initialize the database with the schema if it doesn't exist."""
-    if DATABASE_PATH.exists():
+    """Initialize the database with the schema, or upgrade an existing one."""
+    global _memory_anchor
+
+    if is_memory_database():
+        if _memory_anchor is None:
+            _memory_anchor = get_db()
+            with open(SCHEMA_PATH, "r") as f:
+                _memory_anchor.executescript(f.read())
         return
 
-    DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    if DATABASE_PATH.exists():
+        migrate_db()
+    else:
+        DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(SCHEMA_PATH, "r") as f:
+            schema = f.read()
 
-    with open(SCHEMA_PATH, "r") as f:
-        schema = f.read()
+        conn = get_db()
+        try:
+            conn.executescript(schema)
+            conn.commit()
+        finally:
+            conn.close()
 
+    # WAL lets long reads (exports, backups) run alongside writers; the
+    # setting is stored in the database file, so this only changes it once
     conn = get_db()
     try:
-        conn.executescript(schema)
-        conn.commit()
+        conn.execute("PRAGMA journal_mode = WAL")
     finally:
         conn.close()
 
 
-def query_db(query: str, args: tuple = (), one: bool = False):
-    """Execute a query and return results."""
+def migrate_db():
+    """Apply any MIGRATIONS newer than the database's user_version."""
+    conn = get_db()
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()["user_version"]
+        for target, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.executescript(f"BEGIN; {script} PRAGMA user_version = {target}; COMMIT;")
+    finally:
+        conn.close()
+
+
+def get_catalog_version(name: str, conn: sqlite3.Connection | None = None) -> int:
+    """Change counter for a catalog table ("foods"), bumped by triggers on writes."""
+    row = query_db("SELECT version FROM catalog_versions WHERE name = ?", (name,), one=True, conn=conn)
+    return row["version"] if row else 0
+
+
+def query_db(query: str, args: tuple = (), one: bool = False, conn: sqlite3.Connection | None = None):
+    """Execute a query and return results.
+
+    Pass conn to run on an existing connection (left open) instead of a new one.
+    """
+    if conn is not None:
+        rv = conn.execute(query, args).fetchall()
+        return (rv[0] if rv else None) if one else rv
+
     conn = get_db()
     try:
         cur = conn.execute(query, args)
@@ -62,3 +292,7 @@ def execute_many_db(query: str, args_list: list) -> None:
         conn.commit()
     finally:
         conn.close()
+
+
+if os.environ.get(DATABASE_ENV):
+    configure_database(os.environ[DATABASE_ENV])
@@ -0,0 +1,134 @@
+"""In-process pub/sub that fans log changes out to server-sent event streams.
+
+Each open GET /api/log/stream holds a Subscription with a bounded queue.
+Publishing never blocks a writer: when a slow client's queue is full the
+event is dropped and the subscription is marked for a resync, so the client
+is told to refetch instead of the server buffering without limit. Idle
+streams get a heartbeat comment so proxies keep them open and disconnected
+clients are noticed.
+"""
+
+import json
+import queue
+import threading
+
+from flask import Flask
+
+# Sent in place of queued events after a subscriber fell behind
+RESYNC_EVENT = {"event": "resync", "data": {}}
+
+
+class Subscription:
+    """One client's stream of events for a single user."""
+
+    def __init__(self, user_id: int, max_queue: int):
+        self.user_id = user_id
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._overflowed = False
+
+    def put(self, event: dict) -> bool:
+        """Queue an event; False (and a pending resync) if the queue is full."""
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self._overflowed = True
+            return False
+
+    def get(self, timeout: float) -> dict | None:
+        """Wait for the next event; None when the timeout passes first."""
+        if self._overflowed:
+            self._overflowed = False
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            return RESYNC_EVENT
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """Tracks subscriptions per user and publishes events to them."""
+
+    def __init__(self, max_queue: int = 64, max_subscribers: int = 256):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.subscribers = 0
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: int) -> Subscription | None:
+        """Open a subscription, or None if max_subscribers are connected."""
+        with self._lock:
+            if self.subscribers >= self.max_subscribers:
+                return None
+            subscription = Subscription(user_id, self.max_queue)
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+            self.subscribers += 1
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self.subscribers -= 1
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self, user_id: int) -> bool:
+        with self._lock:
+            return user_id in self._subscriptions
+
+    def publish(self, user_id: int, event: dict) -> None:
+        """Send an event to every subscription of a user without blocking."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        delivered = sum(1 for subscription in subscriptions if subscription.put(event))
+        with self._lock:
+            self.published += delivered
+            self.dropped += len(subscriptions) - delivered
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": self.subscribers,
+                "max_subscribers": self.max_subscribers,
+                "published": self.published,
+                "dropped": self.dropped,
+            }
+
+
+def format_event(event: dict) -> str:
+    """Serialize an event dict as a text/event-stream message."""
+    lines = []
+    if event.get("id") is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event['data'], separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+broker = EventBroker()
+
+
+def init_events(app: Flask) -> None:
+    """Apply event stream settings to the module broker.
+
+    Settings (app.config):
+        EVENTS_HEARTBEAT        seconds between keep-alive comments on idle streams
+        EVENTS_MAX_QUEUE        undelivered events per stream before it resyncs
+        EVENTS_MAX_SUBSCRIBERS  open streams before new ones get 503
+    """
+    app.config.setdefault("EVENTS_HEARTBEAT", 15)
+    app.config.setdefault("EVENTS_MAX_QUEUE", 64)
+    app.config.setdefault("EVENTS_MAX_SUBSCRIBERS", 256)
+
+    broker.max_queue = app.config["EVENTS_MAX_QUEUE"]
+    broker.max_subscribers = app.config["EVENTS_MAX_SUBSCRIBERS"]
@@ -0,0 +1,231 @@
+"""In-memory autocomplete index over food names.
+
+Every food contributes one key per word boundary in its lowercased name
+("greek yogurt" -> "greek yogurt", "yogurt"). Keys live in a sorted list, so
+a prefix lookup is a bisect followed by a short forward scan. Results are
+ranked by match quality (name prefix, then word prefix, then substring) and
+by how often the requesting user has logged each food. Those counts come
+from the main log tables only: days moved out by db/archive.py stop
+counting, so the ranking follows the user's recent history.
+
+The index remembers the foods catalog version it was built from (see
+catalog_versions in schema.sql) and rebuilds when a search finds the
+database has moved on (checked at most once per REFRESH_INTERVAL), so foods
+added or edited by other processes show up.
+"""
+
+import bisect
+import itertools
+import threading
+import time
+
+from cache import LRUCache
+from database import get_catalog_version, get_db, query_db
+
+DEFAULT_LIMIT = 20
+# Users whose log counts are kept in memory
+USER_COUNTS_CACHE_SIZE = 4096
+
+# Seconds between checks of the catalog version; the check opens a
+# connection, which costs more than the search itself
+REFRESH_INTERVAL = 1.0
+
+# Substring matches collected before the scan stops; a one-letter query
+# would otherwise rank most of the catalog
+MAX_SUBSTRING_MATCHES = 500
+
+RANK_NAME_PREFIX = 0
+RANK_WORD_PREFIX = 1
+RANK_SUBSTRING = 2
+
+# Separates names in the substring haystack; never part of a query
+SEPARATOR = "\0"
+
+
+def word_keys(name: str) -> list[str]:
+    """Return the lowercased name suffixes starting at each word boundary."""
+    lowered = name.lower()
+    keys = [lowered]
+    for i in range(1, len(lowered)):
+        if lowered[i].isalnum() and not lowered[i - 1].isalnum():
+            keys.append(lowered[i:])
+    return keys
+
+
+class Catalog:
+    """One immutable generation of the index; searches run on it without the lock."""
+
+    def __init__(self, foods: dict[int, dict], keys: list[tuple[str, int, int]]):
+        self.foods = foods
+        self.keys = keys  # (key, rank, food_id), sorted
+        self.lowered = {food_id: food["name"].lower() for food_id, food in foods.items()}
+        # All names in one string, so the substring scan is str.find in C
+        # rather than a Python loop over every food
+        self.ids = list(self.lowered)
+        self.starts = []
+        offset = 0
+        for lowered in self.lowered.values():
+            self.starts.append(offset)
+            offset += len(lowered) + 1
+        self.haystack = SEPARATOR.join(self.lowered.values())
+
+    def substring_matches(self, needle: str, skip: dict[int, int], limit: int):
+        """Yield ids of foods containing `needle`, except those in `skip`."""
+        found = 0
+        pos = self.haystack.find(needle)
+        while pos != -1 and found < limit:
+            i = bisect.bisect_right(self.starts, pos) - 1
+            food_id = self.ids[i]
+            if food_id not in skip:
+                found += 1
+                yield food_id
+            # Continue after this name
+            next_start = self.starts[i + 1] if i + 1 < len(self.starts) else len(self.haystack)
+            pos = self.haystack.find(needle, next_start)
+
+
+class FoodIndex:
+    """Sorted-array prefix index with per-user log frequency ranking."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._catalog = Catalog({}, [])
+        self._version: int | None = None
+        self._checked_at = 0.0
+        # user_id -> (generation, counts or None). invalidate_user() stores
+        # a new generation without counts; counts computed under an older
+        # generation are returned but not cached
+        self._user_counts = LRUCache(USER_COUNTS_CACHE_SIZE)
+        self._generations = itertools.count(1)
+
+    def build(self) -> None:
+        """Load the whole food catalog from the database."""
+        conn = get_db()
+        try:
+            # Version first: a write landing in between makes the index look
+            # stale and rebuild again, never the other way round
+            version = get_catalog_version("foods", conn)
+            foods = query_db("SELECT id, name, calories FROM foods", conn=conn)
+        finally:
+            conn.close()
+
+        keys = []
+        for food in foods:
+            keys.extend(self._entries(food))
+        keys.sort()
+        catalog = Catalog({food["id"]: food for food in foods}, keys)
+
+        with self._lock:
+            self._catalog = catalog
+            self._version = version
+            self._checked_at = time.monotonic()
+            self._user_counts.clear()
+
+    def refresh(self) -> None:
+        """Rebuild if the foods table changed since the index was built."""
+        now = time.monotonic()
+        if now - self._checked_at < REFRESH_INTERVAL:
+            return
+        self._checked_at = now
+        if get_catalog_version("foods") == self._version:
+            return
+        with self._build_lock:
+            # Another request may have rebuilt while this one waited
+            if get_catalog_version("foods") != self._version:
+                self.build()
+
+    def add(self, food: dict, version: int) -> None:
+        """Index a newly created food, written as catalog `version`.
+
+        Skipped if other writes happened since the index was built; the next
+        search rebuilds instead.
+        """
+        with self._lock:
+            if self._version is None or version != self._version + 1:
+                return
+            catalog = self._catalog
+            keys = list(catalog.keys)
+            for entry in self._entries(food):
+                bisect.insort(keys, entry)
+            self._catalog = Catalog({**catalog.foods, food["id"]: food}, keys)
+            self._version = version
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop a user's cached log counts after their log changes."""
+        with self._lock:
+            self._user_counts.put(user_id, (next(self._generations), None))
+
+    def stats(self) -> dict:
+        """Size and hit counts of the per-user log counts cache."""
+        return self._user_counts.stats()
+
+    def search(self, q: str, user_id: int | None = None, limit: int = DEFAULT_LIMIT) -> list[dict]:
+        """Return up to `limit` foods matching `q`, best matches first."""
+        needle = q.strip().lower()
+        if not needle or SEPARATOR in needle:
+            return []
+
+        self.refresh()
+        counts = self._counts_for(user_id) if user_id is not None else {}
+        with self._lock:
+            catalog = self._catalog
+
+        ranks: dict[int, int] = {}
+        keys = catalog.keys
+        for i in range(bisect.bisect_left(keys, (needle,)), len(keys)):
+            key, rank, food_id = keys[i]
+            if not key.startswith(needle):
+                break
+            if rank < ranks.get(food_id, RANK_SUBSTRING + 1):
+                ranks[food_id] = rank
+
+        # Keep the old LIKE '%q%' behavior for mid-word matches. The user's
+        # own foods are checked first so the scan cap never drops them.
+        if len(ranks) < limit:
+            for food_id in counts:
+                lowered = catalog.lowered.get(food_id)
+                if lowered is not None and food_id not in ranks and needle in lowered:
+                    ranks[food_id] = RANK_SUBSTRING
+            for food_id in catalog.substring_matches(needle, ranks, MAX_SUBSTRING_MATCHES):
+                ranks[food_id] = RANK_SUBSTRING
+
+        foods = catalog.foods
+        ordered = sorted(
+            ranks,
+            key=lambda food_id: (ranks[food_id], -counts.get(food_id, 0), foods[food_id]["name"])
+        )
+        return [foods[food_id] for food_id in ordered[:limit]]
+
+    def _counts_for(self, user_id: int) -> dict[int, int]:
+        generation, counts = self._user_counts.get(user_id, (0, None))
+        if counts is not None:
+            return counts
+
+        rows = query_db(
+            """
+            SELECT li.food_id, COUNT(*) AS times
+            FROM user_meal_log l
+            JOIN user_meal_log_items li ON li.log_id = l.id
+            WHERE l.user_id = ?
+            GROUP BY li.food_id
+            """,
+            (user_id,)
+        )
+        counts = {row["food_id"]: row["times"] for row in rows}
+
+        with self._lock:
+            # A log write since the query started would make these stale
+            if self._user_counts.peek(user_id, (0, None))[0] == generation:
+                self._user_counts.put(user_id, (generation, counts))
+        return counts
+
+    @staticmethod
+    def _entries(food: dict) -> list[tuple[str, int, int]]:
+        keys = word_keys(food["name"])
+        return [(keys[0], RANK_NAME_PREFIX, food["id"])] + [
+            (key, RANK_WORD_PREFIX, food["id"]) for key in keys[1:]
+        ]
+
+
+food_index = FoodIndex()
@@ -0,0 +1,84 @@
+"""Compact per-user calendars of logged days.
+
+A calendar keeps one bitmask per month ("2024-03" -> bit d-1 set when day d
+has entries), which is small enough to cache for many users and converts
+to every /api/log/dates format without touching the database:
+
+    list    ["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-09"]
+    bitmap  {"2024-03": "BwEAAA=="}   (mask as 4 little-endian bytes, base64)
+    ranges  [["2024-03-01", "2024-03-03"], ["2024-03-09", "2024-03-09"]]
+
+Calendars are never modified in place; a write produces an updated copy,
+so readers can use one without locking.
+"""
+
+import base64
+from datetime import date, timedelta
+
+CALENDAR_FORMATS = ("list", "bitmap", "ranges")
+
+
+class LogCalendar:
+    """The days one user has logged, as of a change log version."""
+
+    def __init__(self, months: dict[str, int], version: int):
+        self.months = months
+        self.version = version
+
+    @classmethod
+    def from_dates(cls, dates: list[str], version: int) -> "LogCalendar":
+        months: dict[str, int] = {}
+        for date_str in dates:
+            key, day = date_str[:7], int(date_str[8:10])
+            months[key] = months.get(key, 0) | 1 << (day - 1)
+        return cls(months, version)
+
+    def updated(self, dates: list[str], logged: set[str], version: int) -> "LogCalendar":
+        """Copy with each of `dates` set or cleared by whether it is in `logged`."""
+        months = dict(self.months)
+        for date_str in dates:
+            key, bit = date_str[:7], 1 << (int(date_str[8:10]) - 1)
+            mask = months.get(key, 0) | bit if date_str in logged else months.get(key, 0) & ~bit
+            if mask:
+                months[key] = mask
+            else:
+                months.pop(key, None)
+        return LogCalendar(months, version)
+
+    def __contains__(self, date_str: str) -> bool:
+        return bool(self.months.get(date_str[:7], 0) & 1 << (int(date_str[8:10]) - 1))
+
+    def scoped(self, year: int | None = None, month: int | None = None) -> list[tuple[str, int]]:
+        """(month key, mask) pairs in order, limited to a year or one month."""
+        if month is not None:
+            prefix = f"{year:04d}-{month:02d}"
+        elif year is not None:
+            prefix = f"{year:04d}-"
+        else:
+            prefix = ""
+        return sorted((key, mask) for key, mask in self.months.items() if key.startswith(prefix))
+
+    def dates(self, year: int | None = None, month: int | None = None) -> list[str]:
+        return [
+            f"{key}-{day:02d}"
+            for key, mask in self.scoped(year, month)
+            for day in range(1, 32)
+            if mask & 1 << (day - 1)
+        ]
+
+    def bitmaps(self, year: int | None = None, month: int | None = None) -> dict[str, str]:
+        return {
+            key: base64.b64encode(mask.to_bytes(4, "little")).decode()
+            for key, mask in self.scoped(year, month)
+        }
+
+    def ranges(self, year: int | None = None, month: int | None = None) -> list[list[str]]:
+        """Runs of consecutive logged days as [first, last] pairs."""
+        runs: list[list[date]] = []
+        for date_str in self.dates(year, month):
+            day = date.fromisoformat(date_str)
+            if runs and runs[-1][1] + timedelta(days=1) == day:
+                runs[-1][1] = day
+            else:
+                runs.append([day, day])
+        return [[first.isoformat(), last.isoformat()] for first, last in runs]
@@ -3,6 +3,7 @@
 
 import argparse
 import logging
+import os
 import sys
 from pathlib import Path
 
@@ -11,11 +12,20 @@ sys.path.insert(0, str(Path(__file__).parent))
 from flask import Flask, request
 from flask_cors import CORS
 
-from database import init_db
+import backup
+from admission import init_admission
+from auth import SESSION_MODES, SESSION_SECRET_ENV, init_sessions
+from compression import init_compression
+from database import DATABASE_ENV, configure_database, init_db
+from events import broker, init_events
+from food_index import food_index
+from json_provider import FastJSONProvider
+from profiling import PROFILE_DIR_ENV, init_profiling
 from routes.auth_routes import auth_bp
+from routes.bootstrap_routes import bootstrap_bp
 from routes.food_routes import food_bp
 from routes.meal_routes import meal_bp
-from routes.log_routes import log_bp
+from routes.log_routes import log_bp, calendar_cache, day_cache
 
 # Configure logging
 logging.basicConfig(
@@ -26,13 +36,28 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def create_app() -> Flask:
+def create_app(config: dict | None = None) -> Flask:
     """Create and configure the Flask application."""
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    if config:
+        app.config.update(config)
 
     CORS(app, supports_credentials=True, origins=["http://localhost:5173", "http://localhost:5000"])
 
+    # DATABASE: file path, file: URI or ":memory:" (default: $MEAL_TRACKER_DB or
+    # db/meals.db). The setting is process-wide, shared by every app instance.
+    if app.config.get("DATABASE"):
+        configure_database(app.config["DATABASE"])
     init_db()
+    food_index.build()
+
+    init_sessions(app)
+
+    # First, so the other extensions' hooks are part of the profile
+    init_profiling(app)
+    init_admission(app)
+    init_events(app)
 
     # Request logging middleware
     @app.before_request
@@ -53,15 +78,30 @@ def create_app() -> Flask:
         logger.info(f"<<< {request.method} {request.path} -> {response.status_code}")
         return response
 
+    init_compression(app)
+
     app.register_blueprint(auth_bp)
     app.register_blueprint(food_bp)
     app.register_blueprint(meal_bp)
     app.register_blueprint(log_bp)
+    app.register_blueprint(bootstrap_bp)
 
     @app.route("/api/health", methods=["GET"])
     def health():
         return {"status": "ok"}
 
+    @app.route("/api/metrics", methods=["GET"])
+    def metrics():
+        admission = app.extensions.get("admission")
+        return {
+            "admission": admission.stats() if admission else None,
+            "day_cache": day_cache.stats(),
+            "calendar_cache": calendar_cache.stats(),
+            "food_counts_cache": food_index.stats(),
+            "events": broker.stats(),
+            "last_backup": backup.last_backup
+        }
+
     # Log registered routes
     logger.info("Registered routes:")
     for rule in app.url_map.iter_rules():
@@ -77,10 +117,73 @@ def main():
     parser.add_argument("--port", type=int, default=5001, help="Port to listen on (default: 5001)")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind to (default: 127.0.0.1)")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument(
+        "--db",
+        help=f"Database file, file: URI, or :memory: for a throwaway in-memory database "
+             f"(default: ${DATABASE_ENV} or db/meals.db)"
+    )
+    parser.add_argument("--no-compress", action="store_true", help="Disable response compression")
+    parser.add_argument("--compress-level", type=int, default=6, help="gzip compression level 1-9 (default: 6)")
+    parser.add_argument("--compress-br-level", type=int, default=4, help="brotli quality 0-11, if brotli is installed (default: 4)")
+    parser.add_argument("--compress-min-size", type=int, default=500, help="Minimum body size in bytes to compress (default: 500)")
+    parser.add_argument("--max-reads", type=int, default=16, help="Concurrent read requests before queueing (default: 16)")
+    parser.add_argument("--max-writes", type=int, default=4, help="Concurrent write requests before queueing (default: 4)")
+    parser.add_argument("--max-queue", type=int, default=32, help="Queued requests per budget before shedding with 503 (default: 32)")
+    parser.add_argument("--queue-timeout", type=float, default=2.0, help="Seconds a request may wait in the queue (default: 2.0)")
+    parser.add_argument("--backup-dir", type=Path, help="Directory for scheduled online backups (disabled if omitted)")
+    parser.add_argument("--backup-interval", type=float, default=24.0, help="Hours between scheduled backups (default: 24)")
+    parser.add_argument("--backup-keep", type=int, default=backup.DEFAULT_KEEP, help=f"Backups to retain (default: {backup.DEFAULT_KEEP})")
+    parser.add_argument("--backup-compress", action="store_true", help="gzip scheduled backups")
+    parser.add_argument(
+        "--session-mode",
+        choices=SESSION_MODES,
+        default="db",
+        help=f"Session tokens: database rows or HMAC-signed with ${SESSION_SECRET_ENV} (default: db)"
+    )
+
+    parser.add_argument("--profile", action="store_true", help="Write a cProfile .prof file for every request")
+    parser.add_argument("--profile-dir", help=f"Directory for .prof files (default: ${PROFILE_DIR_ENV} or ./profiles)")
+    parser.add_argument(
+        "--profile-path",
+        action="append",
+        default=[],
+        help="Only profile paths starting with this prefix (repeatable)"
+    )
+    parser.add_argument("--profile-min-ms", type=float, default=0, help="Discard profiles of faster requests (default: 0)")
 
     args = parser.parse_args()
 
-    app = create_app()
+    config = {
+        "DATABASE": args.db,
+        "COMPRESS_ENABLED": not args.no_compress,
+        "COMPRESS_LEVEL": args.compress_level,
+        "COMPRESS_BR_LEVEL": args.compress_br_level,
+        "COMPRESS_MIN_SIZE": args.compress_min_size,
+        "ADMISSION_MAX_READS": args.max_reads,
+        "ADMISSION_MAX_WRITES": args.max_writes,
+        "ADMISSION_MAX_QUEUE": args.max_queue,
+        "ADMISSION_QUEUE_TIMEOUT": args.queue_timeout,
+        "SESSION_MODE": args.session_mode,
+        "PROFILE_PATHS": args.profile_path,
+        "PROFILE_MIN_MS": args.profile_min_ms,
+    }
+    # Only override the environment defaults when given on the command line
+    if args.profile:
+        config["PROFILE_ENABLED"] = True
+    if args.profile_dir:
+        config["PROFILE_DIR"] = args.profile_dir
+
+    app = create_app(config)
+    # With --debug the reloader runs this in a watcher process and again in
+    # the serving child (WERKZEUG_RUN_MAIN=true); only the child backs up
+    if args.backup_dir and (not args.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        backup.start_backup_scheduler(
+            args.backup_dir,
+            args.backup_interval * 3600,
+            compress=args.backup_compress,
+            keep=args.backup_keep
+        )
+
     logger.info(f"Starting API server on http://{args.host}:{args.port}")
     app.run(host=args.host, port=args.port, debug=args.debug)
 
@@ -0,0 +1,41 @@
+"""Keyset (cursor) pagination helpers for list endpoints.
+
+A page is requested with ``?after=<key>&limit=<n>``, where ``key`` is the
+sort column of the last row the client saw (a food/meal name or a date).
+Endpoints fetch ``limit + 1`` rows with ``WHERE key > ? ORDER BY key``, so
+each page is a single index range scan regardless of how deep it is.
+Requests without either parameter keep the original unpaginated response.
+"""
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def parse_page_args(args) -> tuple[str, int] | None:
+    """Return (after, limit) if the request asks for a page, else None.
+
+    Raises ValueError if limit is not a positive integer.
+    """
+    if "after" not in args and "limit" not in args:
+        return None
+
+    after = args.get("after", "")
+    limit_raw = args.get("limit")
+
+    if limit_raw is None:
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        limit = int(limit_raw)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+
+    return after, min(limit, MAX_PAGE_SIZE)
+
+
+def split_page(rows: list, limit: int, key: str) -> tuple[list, str | None]:
+    """Trim a limit + 1 fetch to one page and compute the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, rows[-1][key]
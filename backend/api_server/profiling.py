@@ -0,0 +1,108 @@
+"""Opt-in cProfile profiling of selected API requests.
+
+Profiles are written as .prof files named after the time, method, route and
+duration, for offline analysis with pstats, snakeviz or similar viewers:
+
+    python -m pstats profiles/20240101T120000123456Z-GET-api.log-412ms.prof
+
+Requests are profiled when profiling is enabled (--profile or
+MEAL_TRACKER_PROFILE=1), or one at a time when they carry an X-Profile
+header matching MEAL_TRACKER_PROFILE_SECRET. When neither is configured no
+hooks are registered, so there is no per-request cost.
+"""
+
+import cProfile
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import Flask, g, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "MEAL_TRACKER_PROFILE"
+PROFILE_SECRET_ENV = "MEAL_TRACKER_PROFILE_SECRET"
+PROFILE_DIR_ENV = "MEAL_TRACKER_PROFILE_DIR"
+PROFILE_HEADER = "X-Profile"
+
+
+def route_tag(rule: str) -> str:
+    """Turn a URL rule like /api/log/<int:log_id> into a filename-safe tag."""
+    return re.sub(r"[^A-Za-z0-9_-]+", ".", rule).strip(".") or "root"
+
+
+def init_profiling(app: Flask) -> None:
+    """Register before/teardown request hooks that profile selected requests.
+
+    Register this before other extensions so their hooks are included.
+
+    Settings (app.config):
+        PROFILE_ENABLED  profile every matching request (default: $MEAL_TRACKER_PROFILE)
+        PROFILE_SECRET   profile requests whose X-Profile header equals this
+                         value (default: $MEAL_TRACKER_PROFILE_SECRET)
+        PROFILE_DIR      where .prof files are written
+                         (default: $MEAL_TRACKER_PROFILE_DIR or ./profiles)
+        PROFILE_PATHS    only profile paths starting with one of these
+                         prefixes (default: all)
+        PROFILE_MIN_MS   discard profiles of requests faster than this
+    """
+    app.config.setdefault("PROFILE_ENABLED", os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes"))
+    app.config.setdefault("PROFILE_SECRET", os.environ.get(PROFILE_SECRET_ENV))
+    app.config.setdefault("PROFILE_DIR", os.environ.get(PROFILE_DIR_ENV, "profiles"))
+    app.config.setdefault("PROFILE_PATHS", [])
+    app.config.setdefault("PROFILE_MIN_MS", 0)
+
+    enabled = app.config["PROFILE_ENABLED"]
+    secret = app.config["PROFILE_SECRET"]
+    if not enabled and not secret:
+        return
+
+    profile_dir = Path(app.config["PROFILE_DIR"])
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    paths = tuple(app.config["PROFILE_PATHS"])
+    min_ms = app.config["PROFILE_MIN_MS"]
+    # Only one profiler can be active per process (Python 3.12+), so
+    # requests that arrive while another is being profiled run unprofiled
+    lock = threading.Lock()
+
+    logger.info(f"Profiling: {'all' if enabled else 'X-Profile'} requests to {profile_dir.absolute()}")
+
+    def wanted() -> bool:
+        if paths and not request.path.startswith(paths):
+            return False
+        if enabled:
+            return True
+        header = request.headers.get(PROFILE_HEADER, "")
+        return bool(header) and hmac.compare_digest(header.encode(), secret.encode())
+
+    @app.before_request
+    def start_profile():
+        if not wanted() or not lock.acquire(blocking=False):
+            return None
+        g.profile = (cProfile.Profile(), time.perf_counter())
+        g.profile[0].enable()
+        return None
+
+    @app.teardown_request
+    def stop_profile(exc):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return
+        profiler, started = profile
+        try:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms < min_ms:
+                return
+            rule = request.url_rule.rule if request.url_rule else request.path
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+            path = profile_dir / f"{timestamp}-{request.method}-{route_tag(rule)}-{elapsed_ms:.0f}ms.prof"
+            profiler.dump_stats(path)
+            logger.info(f"Profiling: wrote {path.name}")
+        finally:
+            lock.release()
@@ -46,7 +46,7 @@ def register():
     )
     logger.info(f"Register: Created user id={user_id}")
 
-    token = create_session_token(user_id, remember_me=True)
+    token = create_session_token(user_id, remember_me=True, username=username)
     logger.info(f"Register: Created session token for user id={user_id}")
 
     response = make_response(jsonify({"id": user_id, "username": username}), 201)
@@ -93,7 +93,7 @@ def login():
         return jsonify({"error": "User not found"}), 401
 
     logger.info(f"Login: Found user id={user['id']}")
-    token = create_session_token(user["id"], remember_me)
+    token = create_session_token(user["id"], remember_me, user["username"])
     logger.info(f"Login: Created session token for user id={user['id']}")
 
     response = make_response(jsonify({
@@ -117,7 +117,11 @@ def login():
 
 @auth_bp.route("/logout", methods=["POST"])
 def logout():
-    """Logout and invalidate session."""
+    """Logout and invalidate session.
+
+    With signed sessions this signs the user out on all devices; see
+    invalidate_session_token().
+    """
     logger.info("Logout endpoint called")
     token = request.cookies.get("session_token")
 
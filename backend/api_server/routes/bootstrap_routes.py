@@ -0,0 +1,66 @@
+import hashlib
+from datetime import datetime
+
+from flask import Blueprint, current_app, request, jsonify, g
+
+from auth import login_required
+from database import get_db
+from routes.food_routes import list_foods
+from routes.log_routes import build_daily_log, get_log_dates, get_pacific_today
+from routes.meal_routes import list_meal_templates
+
+bootstrap_bp = Blueprint("bootstrap", __name__, url_prefix="/api/bootstrap")
+
+
+def content_version(items: list) -> str:
+    """Hash a section's serialized content into a short version string."""
+    return hashlib.sha256(current_app.json.dumps(items).encode()).hexdigest()[:16]
+
+
+def versioned_section(items: list, client_version: str | None) -> dict:
+    """Return a section's items, or only its version if the client has it."""
+    version = content_version(items)
+    if version == client_version:
+        return {"version": version, "unchanged": True}
+    return {"version": version, "items": items}
+
+
+@bootstrap_bp.route("", methods=["GET"])
+@login_required
+def bootstrap():
+    """Get everything the app needs on launch in one response.
+
+    Returns the user, foods, meal templates, the log for ?date= (default
+    today) and the logged dates. All sections are read from one connection
+    inside one read transaction, so they describe the same snapshot. Send
+    ?foods_version= and ?meals_version= from a previous response to have
+    unchanged sections returned as {"version", "unchanged": true}.
+    """
+    date_str = request.args.get("date", get_pacific_today().isoformat())
+
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    user_id = g.user["id"]
+
+    conn = get_db()
+    try:
+        conn.execute("BEGIN")
+        foods = list_foods(conn)
+        meals = list_meal_templates(conn)
+        daily_log = build_daily_log(user_id, date_str, conn)
+        dates = get_log_dates(user_id, conn)
+    finally:
+        conn.close()
+
+    response = jsonify({
+        "user": g.user,
+        "foods": versioned_section(foods, request.args.get("foods_version")),
+        "meals": versioned_section(meals, request.args.get("meals_version")),
+        "log": daily_log,
+        "dates": dates
+    })
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
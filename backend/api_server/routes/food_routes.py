@@ -1,34 +1,53 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 
 from auth import login_required
-from database import query_db, execute_db
+from database import get_catalog_version, get_db, query_db
+from food_index import food_index
+from pagination import parse_page_args, split_page
 
 food_bp = Blueprint("foods", __name__, url_prefix="/api/foods")
 
 
+def list_foods(conn=None) -> list[dict]:
+    """Get every food item ordered by name."""
+    return query_db("SELECT id, name, calories FROM foods ORDER BY name", conn=conn)
+
+
 @food_bp.route("", methods=["GET"])
 @login_required
 def get_foods():
-    """Get all food items."""
-    foods = query_db("SELECT id, name, calories FROM foods ORDER BY name")
-    return jsonify([dict(f) for f in foods])
+    """Get all food items, or one page of them with ?after=<name>&limit=."""
+    try:
+        page = parse_page_args(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid limit. Must be a positive integer"}), 400
+
+    if page is None:
+        return jsonify(list_foods())
+
+    after, limit = page
+    foods = query_db(
+        "SELECT id, name, calories FROM foods WHERE name > ? ORDER BY name LIMIT ?",
+        (after, limit + 1)
+    )
+    foods, next_cursor = split_page(foods, limit, "name")
+
+    return jsonify({
+        "items": foods,
+        "next_cursor": next_cursor
+    })
 
 
 @food_bp.route("/search", methods=["GET"])
 @login_required
 def search_foods():
-    """Search foods by name."""
+    """Search foods by name, ranked by match quality and the user's history."""
     q = request.args.get("q", "").strip()
 
     if not q:
         return jsonify([])
 
-    foods = query_db(
-        "SELECT id, name, calories FROM foods WHERE name LIKE ? ORDER BY name LIMIT 20",
-        (f"%{q}%",)
-    )
-
-    return jsonify([dict(f) for f in foods])
+    return jsonify(food_index.search(q, g.user["id"]))
 
 
 @food_bp.route("", methods=["POST"])
@@ -58,9 +77,18 @@ def create_food():
     if existing:
         return jsonify({"error": "Food with this name already exists"}), 400
 
-    food_id = execute_db(
-        "INSERT INTO foods (name, calories) VALUES (?, ?)",
-        (name, int(calories))
-    )
-
-    return jsonify({"id": food_id, "name": name, "calories": int(calories)}), 201
+    conn = get_db()
+    try:
+        food_id = conn.execute(
+            "INSERT INTO foods (name, calories) VALUES (?, ?)",
+            (name, int(calories))
+        ).lastrowid
+        version = get_catalog_version("foods", conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    food = {"id": food_id, "name": name, "calories": int(calories)}
+    food_index.add(food, version)
+
+    return jsonify(food), 201
@@ -1,14 +1,51 @@
-from datetime import datetime, date
+import csv
+import heapq
+import io
+import json
+import threading
+from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, Response, current_app, request, jsonify, g
 
+from archive import (
+    get_archived_dates, get_archived_dates_among, get_archived_dates_between, get_archived_day,
+    get_archived_entries, get_archived_entry, iter_archived_rows, restore_days
+)
 from auth import login_required
+from cache import LRUCache
+from compression import compress_stream
 from database import query_db, execute_db, get_db
+from events import RESYNC_EVENT, broker, format_event
+from food_index import food_index
+from log_calendar import CALENDAR_FORMATS, LogCalendar
+from pagination import parse_page_args, split_page
+from routes.meal_routes import refresh_meal_totals
 
 log_bp = Blueprint("log", __name__, url_prefix="/api/log")
 
 PACIFIC_TZ = ZoneInfo("America/Los_Angeles")
 MEAL_TYPES = ["breakfast", "morning_snack", "lunch", "afternoon_snack", "dinner", "evening_snack"]
+CHANGES_PAGE_SIZE = 500
+DAY_CACHE_SIZE = 2048
+CALENDAR_CACHE_SIZE = 4096
+# Longest target range accepted by POST /api/log/copy, in days
+COPY_MAX_DAYS = 92
+# Times DELETE /api/log restores archived days in its range before giving up
+RANGE_DELETE_ATTEMPTS = 3
+# Client reconnect delay sent on event streams, in milliseconds
+STREAM_RETRY_MS = 5000
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CSV_COLUMNS = ["date", "meal_type", "meal_name", "food_name", "calories", "quantity", "total_calories"]
+# Output is buffered into chunks of roughly this size before being yielded
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Serialized daily logs keyed by (user_id, date), stored as (version, payload)
+day_cache = LRUCache(DAY_CACHE_SIZE)
+# LogCalendar of logged days keyed by user_id, for GET /api/log/dates
+calendar_cache = LRUCache(CALENDAR_CACHE_SIZE)
+# Serializes calendar updates so concurrent writes cannot drop each other's days
+calendar_lock = threading.Lock()
 
 
 def get_pacific_today() -> date:
@@ -16,6 +53,79 @@ def get_pacific_today() -> date:
     return datetime.now(PACIFIC_TZ).date()
 
 
+def get_log_version(user_id: int, conn=None) -> int:
+    """Get the latest change id of a user's whole log (0 if never written)."""
+    row = query_db(
+        "SELECT MAX(id) AS version FROM user_meal_log_changes WHERE user_id = ?",
+        (user_id,),
+        one=True,
+        conn=conn
+    )
+    return row["version"] or 0
+
+
+def after_log_write(user_id: int, dates: list[str]) -> None:
+    """Refresh in-process state derived from a user's meal log."""
+    food_index.invalidate_user(user_id)
+    for date_str in dates:
+        day_cache.pop((user_id, date_str))
+
+    version = None
+    # Writes should not show up as calendar cache hits or misses
+    if user_id in calendar_cache:
+        version = update_calendar(user_id, dates)
+
+    if broker.has_subscribers(user_id):
+        broker.publish(user_id, {
+            "id": version or get_log_version(user_id),
+            "event": "log",
+            "data": {"dates": sorted(set(dates))}
+        })
+
+
+def get_calendar(user_id: int) -> LogCalendar:
+    """Get the user's cached calendar, rebuilding it if the log moved on.
+
+    The version check also picks up writes made by other processes.
+    """
+    version = get_log_version(user_id)
+    calendar = calendar_cache.get(user_id)
+    if calendar is None or calendar.version != version:
+        calendar = LogCalendar.from_dates(get_log_dates(user_id), version)
+        calendar_cache.put(user_id, calendar)
+    return calendar
+
+
+def may_be_archived(user_id: int, date_str: str, conn=None) -> bool:
+    """Whether a day without hot entries needs a look in the archive.
+
+    Only logged days get archived, so a current cached calendar that lacks
+    the day rules it out without opening the archive.
+    """
+    calendar = calendar_cache.peek(user_id)
+    return calendar is None or date_str in calendar or calendar.version != get_log_version(user_id, conn)
+
+
+def update_calendar(user_id: int, dates: list[str]) -> int:
+    """Re-check only the written dates in a cached calendar; returns the new version."""
+    with calendar_lock:
+        # Read before the dates, so a write that lands in between leaves
+        # the calendar looking stale rather than current
+        version = get_log_version(user_id)
+        calendar = calendar_cache.peek(user_id)
+        if calendar is not None:
+            rows = query_db(
+                """
+                SELECT DISTINCT meal_date FROM user_meal_log
+                WHERE user_id = ? AND meal_date IN (SELECT value FROM json_each(?))
+                """,
+                (user_id, json.dumps(dates))
+            )
+            logged = {row["meal_date"] for row in rows} | get_archived_dates_among(user_id, dates)
+            calendar_cache.put(user_id, calendar.updated(dates, logged, version))
+    return version
+
+
 def get_log_entry_with_items(log_id: int) -> dict | None:
     """Get a log entry with its items and total calories."""
     log = query_db(
@@ -42,8 +152,7 @@ def get_log_entry_with_items(log_id: int) -> dict | None:
         (log_id,)
     )
 
-    items_list = [dict(i) for i in items]
-    total_calories = sum(i["calories"] * i["quantity"] for i in items_list)
+    total_calories = sum(i["calories"] * i["quantity"] for i in items)
 
     return {
         "id": log["id"],
@@ -51,24 +160,86 @@ def get_log_entry_with_items(log_id: int) -> dict | None:
         "meal_type": log["meal_type"],
         "meal_id": log["meal_id"],
         "meal_name": log["meal_name"],
-        "items": items_list,
+        "items": items,
         "total_calories": total_calories
     }
 
 
-@log_bp.route("", methods=["GET"])
-@login_required
-def get_daily_log():
-    """Get user's meal log for a specific date."""
-    date_str = request.args.get("date", get_pacific_today().isoformat())
+def get_log_entries_with_items(log_ids: list[int]) -> list[dict]:
+    """Get several log entries with their items, using one query for each."""
+    if not log_ids:
+        return []
 
-    try:
-        datetime.strptime(date_str, "%Y-%m-%d")
-    except ValueError:
-        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+    ids_json = json.dumps(log_ids)
 
-    user_id = g.user["id"]
+    logs = query_db(
+        """
+        SELECT l.id, l.meal_date, l.meal_type, l.meal_id, m.name as meal_name
+        FROM user_meal_log l
+        LEFT JOIN meals m ON m.id = l.meal_id
+        WHERE l.id IN (SELECT value FROM json_each(?))
+        ORDER BY l.meal_date, l.id
+        """,
+        (ids_json,)
+    )
+
+    items = query_db(
+        """
+        SELECT li.log_id, li.id, li.food_id, f.name as food_name, f.calories, li.quantity
+        FROM user_meal_log_items li
+        JOIN foods f ON f.id = li.food_id
+        WHERE li.log_id IN (SELECT value FROM json_each(?))
+        """,
+        (ids_json,)
+    )
+
+    items_by_log: dict[int, list] = {}
+    for item in items:
+        items_by_log.setdefault(item.pop("log_id"), []).append(item)
+
+    entries = []
+    for log in logs:
+        log_items = items_by_log.get(log["id"], [])
+        log["items"] = log_items
+        log["total_calories"] = sum(i["calories"] * i["quantity"] for i in log_items)
+        entries.append(log)
+
+    return entries
+
+
+def get_day_version(user_id: int, date_str: str) -> str:
+    """Get a version string for one user's day, e.g. "42-7".
 
+    The first part is the day's latest change id (0 if never written):
+    every insert, update and delete of its entries adds a change row, so it
+    moves on any edit, including deletions. The second sums the versions of
+    the foods and meals the day shows, which go up when their names or
+    calories are edited; catalog rows the day does not use leave it alone.
+    Archived days keep the names and calories they were archived with, so
+    only their change id matters.
+    """
+    row = query_db(
+        """
+        SELECT
+            (SELECT MAX(id) FROM user_meal_log_changes WHERE user_id = ? AND meal_date = ?) AS version,
+            (SELECT COALESCE(SUM(f.version), 0)
+             FROM user_meal_log l
+             JOIN user_meal_log_items li ON li.log_id = l.id
+             JOIN foods f ON f.id = li.food_id
+             WHERE l.user_id = ? AND l.meal_date = ?)
+            + (SELECT COALESCE(SUM(m.version), 0)
+               FROM user_meal_log l
+               JOIN meals m ON m.id = l.meal_id
+               WHERE l.user_id = ? AND l.meal_date = ?) AS catalog
+        """,
+        (user_id, date_str, user_id, date_str, user_id, date_str),
+        one=True
+    )
+    return f"{row['version'] or 0}-{row['catalog']}"
+
+
+def build_daily_log(user_id: int, date_str: str, conn=None) -> dict:
+    """Build the per-meal-type log of one user's day."""
     logs = query_db(
         """
         SELECT l.id, l.meal_type, l.meal_id, m.name as meal_name
@@ -76,9 +247,14 @@ def get_daily_log():
         LEFT JOIN meals m ON m.id = l.meal_id
         WHERE l.user_id = ? AND l.meal_date = ?
         """,
-        (user_id, date_str)
+        (user_id, date_str),
+        conn=conn
     )
 
+    if not logs and may_be_archived(user_id, date_str, conn):
+        # Archived days come back with their items already included
+        logs = get_archived_day(user_id, date_str)
+
     logs_by_type = {log["meal_type"]: log for log in logs}
 
     meals_data = {}
@@ -88,24 +264,26 @@ def get_daily_log():
         log = logs_by_type.get(meal_type)
 
         if log:
-            items = query_db(
-                """
-                SELECT li.id, li.food_id, f.name as food_name, f.calories, li.quantity
-                FROM user_meal_log_items li
-                JOIN foods f ON f.id = li.food_id
-                WHERE li.log_id = ?
-                """,
-                (log["id"],)
-            )
+            items = log.get("items")
+            if items is None:
+                items = query_db(
+                    """
+                    SELECT li.id, li.food_id, f.name as food_name, f.calories, li.quantity
+                    FROM user_meal_log_items li
+                    JOIN foods f ON f.id = li.food_id
+                    WHERE li.log_id = ?
+                    """,
+                    (log["id"],),
+                    conn=conn
+                )
 
-            items_list = [dict(i) for i in items]
-            calories = sum(i["calories"] * i["quantity"] for i in items_list)
+            calories = sum(i["calories"] * i["quantity"] for i in items)
             total_calories += calories
 
             meals_data[meal_type] = {
                 "log_id": log["id"],
                 "meal_name": log["meal_name"],
-                "items": items_list,
+                "items": items,
                 "calories": calories
             }
         else:
@@ -116,34 +294,572 @@ def get_daily_log():
                 "calories": 0
             }
 
-    return jsonify({
+    return {
         "date": date_str,
         "total_calories": total_calories,
         "meals": meals_data
-    })
+    }
+
+
+def get_log_dates(user_id: int, conn=None) -> list[str]:
+    """Get every date the user has logged, in ascending order, archived ones included."""
+    dates = query_db(
+        """
+        SELECT DISTINCT meal_date
+        FROM user_meal_log
+        WHERE user_id = ?
+        ORDER BY meal_date ASC
+        """,
+        (user_id,),
+        conn=conn
+    )
+    return sorted({d["meal_date"] for d in dates}.union(get_archived_dates(user_id)))
+
+
+@log_bp.route("", methods=["GET"])
+@login_required
+def get_daily_log():
+    """Get user's meal log for a specific date.
+
+    Responses carry a weak ETag derived from the day's change version and
+    the versions of the foods and meals it shows, and are answered with 304
+    when the client's If-None-Match still matches.
+    Serialized days are kept in an LRU that log writes invalidate.
+    """
+    date_str = request.args.get("date", get_pacific_today().isoformat())
+
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    user_id = g.user["id"]
+    version = get_day_version(user_id, date_str)
+    etag = f"day-{user_id}-{date_str}-{version}"
+
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        cached = day_cache.get((user_id, date_str))
+        if cached and cached[0] == version:
+            payload = cached[1]
+        else:
+            payload = current_app.json.dumps(build_daily_log(user_id, date_str)) + "\n"
+            day_cache.put((user_id, date_str), (version, payload))
+        response = current_app.response_class(payload, mimetype="application/json")
+
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @log_bp.route("/dates", methods=["GET"])
 @login_required
 def get_available_dates():
-    """Get list of dates where the user has meal data."""
+    """Get list of dates where the user has meal data.
+
+    Supports keyset pagination with ?after=<YYYY-MM-DD>&limit=. Otherwise
+    the dates come from the user's cached calendar: scope them with ?year=
+    (and ?month=), and use ?format=bitmap (per-month base64 bitmaps) or
+    ?format=ranges (runs of consecutive days) for a compact response.
+    Calendar responses carry a weak ETag derived from the log version and
+    the requested format and scope.
+    """
     user_id = g.user["id"]
 
+    try:
+        page = parse_page_args(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid limit. Must be a positive integer"}), 400
+
+    if page is None:
+        fmt = request.args.get("format", "list")
+        if fmt not in CALENDAR_FORMATS:
+            return jsonify({"error": f"Invalid format. Must be one of: {', '.join(CALENDAR_FORMATS)}"}), 400
+
+        try:
+            year = int(request.args["year"]) if "year" in request.args else None
+            month = int(request.args["month"]) if "month" in request.args else None
+        except ValueError:
+            return jsonify({"error": "year and month must be integers"}), 400
+
+        if year is not None and not 1 <= year <= 9999:
+            return jsonify({"error": "Invalid year"}), 400
+
+        if month is not None and (year is None or not 1 <= month <= 12):
+            return jsonify({"error": "month must be 1-12 and requires year"}), 400
+
+        calendar = get_calendar(user_id)
+        # The same version renders differently per format and scope
+        etag = f"dates-{user_id}-{fmt}-{year or ''}-{month or ''}-{calendar.version}"
+
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        elif fmt == "bitmap":
+            response = jsonify({"format": "bitmap", "months": calendar.bitmaps(year, month)})
+        elif fmt == "ranges":
+            response = jsonify({"format": "ranges", "ranges": calendar.ranges(year, month)})
+        else:
+            response = jsonify({"dates": calendar.dates(year, month)})
+
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    if any(arg in request.args for arg in ("format", "year", "month")):
+        return jsonify({"error": "format, year and month cannot be combined with after/limit"}), 400
+
+    after, limit = page
     dates = query_db(
         """
         SELECT DISTINCT meal_date
         FROM user_meal_log
-        WHERE user_id = ?
+        WHERE user_id = ? AND meal_date > ?
         ORDER BY meal_date ASC
+        LIMIT ?
         """,
-        (user_id,)
+        (user_id, after, limit + 1)
     )
+    dates = sorted({d["meal_date"] for d in dates}.union(get_archived_dates(user_id, after, limit + 1)))
+    dates, next_cursor = split_page([{"meal_date": d} for d in dates], limit, "meal_date")
 
     return jsonify({
-        "dates": [d["meal_date"] for d in dates]
+        "dates": [d["meal_date"] for d in dates],
+        "next_cursor": next_cursor
     })
 
 
+@log_bp.route("/changes", methods=["GET"])
+@login_required
+def get_log_changes():
+    """Get log entries created, updated or deleted since a sync token.
+
+    The token is the id of the last change the client has applied; start
+    with since=0 for a full sync. Entries that were deleted come back as
+    tombstones. When has_more is true, call again with the returned token.
+    """
+    user_id = g.user["id"]
+
+    try:
+        since = int(request.args.get("since", 0))
+        limit = min(int(request.args.get("limit", CHANGES_PAGE_SIZE)), CHANGES_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+
+    if since < 0 or limit < 1:
+        return jsonify({"error": "since must be >= 0 and limit must be positive"}), 400
+
+    changes = query_db(
+        """
+        SELECT id, log_id, meal_date, meal_type, op
+        FROM user_meal_log_changes
+        WHERE user_id = ? AND id > ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (user_id, since, limit + 1)
+    )
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # Several changes to one entry collapse into its latest state
+    latest = {change["log_id"]: change for change in changes}
+
+    updated_ids = [log_id for log_id, change in latest.items() if change["op"] == "upsert"]
+    deleted = [
+        {"id": log_id, "meal_date": change["meal_date"], "meal_type": change["meal_type"]}
+        for log_id, change in latest.items()
+        if change["op"] == "delete"
+    ]
+
+    updated = get_log_entries_with_items(updated_ids)
+
+    # Archiving keeps an entry's upsert change but moves the entry itself
+    # to the archive, so a full sync has to look there too. The archiver
+    # copies before it deletes and a restore inserts before it removes the
+    # archived copy, so an entry found in neither store was deleted or
+    # restored by a later change, which a later page reports.
+    found = {entry["id"] for entry in updated}
+    archived_ids = [log_id for log_id in updated_ids if log_id not in found]
+    if archived_ids:
+        updated += get_archived_entries(user_id, archived_ids)
+        updated.sort(key=lambda entry: (entry["meal_date"], entry["id"]))
+
+    return jsonify({
+        "updated": updated,
+        "deleted": deleted,
+        "token": changes[-1]["id"] if changes else since,
+        "has_more": has_more
+    })
+
+
+def get_missed_event(user_id: int, since: int) -> dict | None:
+    """Summarize changes after an event id as one event, for reconnects."""
+    rows = query_db(
+        """
+        SELECT meal_date, MAX(id) AS version
+        FROM user_meal_log_changes
+        WHERE user_id = ? AND id > ?
+        GROUP BY meal_date
+        LIMIT ?
+        """,
+        (user_id, since, CHANGES_PAGE_SIZE + 1)
+    )
+
+    if not rows:
+        return None
+
+    if len(rows) > CHANGES_PAGE_SIZE:
+        return RESYNC_EVENT
+
+    return {
+        "id": max(row["version"] for row in rows),
+        "event": "log",
+        "data": {"dates": sorted(row["meal_date"] for row in rows)}
+    }
+
+
+@log_bp.route("/stream", methods=["GET"])
+@login_required
+def stream_log_changes():
+    """Push a notification whenever the user's log changes (server-sent events).
+
+    Each "log" event carries the dates that changed and a change id; clients
+    refetch those days (cheap with ETags). After a reconnect, Last-Event-ID
+    replays what was missed as a single event. A "resync" event means the
+    client fell behind and should refetch everything it shows.
+    """
+    user_id = g.user["id"]
+
+    # Subscribe before looking for missed changes so none fall in between
+    subscription = broker.subscribe(user_id)
+    if subscription is None:
+        response = jsonify({"error": "Too many open event streams, please retry"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(STREAM_RETRY_MS // 1000)
+        return response
+
+    missed = None
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    if last_event_id.isdigit():
+        missed = get_missed_event(user_id, int(last_event_id))
+
+    heartbeat = current_app.config.get("EVENTS_HEARTBEAT", 15)
+
+    def generate():
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        if missed:
+            yield format_event(missed)
+        while True:
+            event = subscription.get(heartbeat)
+            yield format_event(event) if event else ": heartbeat\n\n"
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Ask nginx-style proxies not to buffer the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    # Runs on client disconnect, including before the first event is sent
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
+
+
+def iter_export_rows(user_id: int):
+    """Yield one row per log item (or per empty log) from a single cursor.
+
+    Archived days are merged in by date, so the export covers all history.
+    A day left in both stores by an interrupted move comes from the hot
+    tables only.
+    """
+    conn = get_db()
+    try:
+        hot_dates = {
+            row["meal_date"] for row in conn.execute(
+                "SELECT DISTINCT meal_date FROM user_meal_log WHERE user_id = ?",
+                (user_id,)
+            )
+        }
+        cursor = conn.execute(
+            """
+            SELECT l.id AS log_id, l.meal_date, l.meal_type, l.meal_id, m.name AS meal_name,
+                   li.id AS item_id, li.food_id, f.name AS food_name, f.calories, li.quantity
+            FROM user_meal_log l
+            LEFT JOIN meals m ON m.id = l.meal_id
+            LEFT JOIN user_meal_log_items li ON li.log_id = l.id
+            LEFT JOIN foods f ON f.id = li.food_id
+            WHERE l.user_id = ?
+            ORDER BY l.meal_date, l.id
+            """,
+            (user_id,)
+        )
+        yield from heapq.merge(
+            cursor,
+            iter_archived_rows(user_id, hot_dates),
+            key=lambda row: (row["meal_date"], row["log_id"])
+        )
+    finally:
+        conn.close()
+
+
+def iter_export_ndjson(rows, dumps):
+    """Group item rows into one JSON line per log entry."""
+    entry = None
+    for row in rows:
+        if entry is None or entry["id"] != row["log_id"]:
+            if entry is not None:
+                yield dumps(entry) + "\n"
+            entry = {
+                "id": row["log_id"],
+                "meal_date": row["meal_date"],
+                "meal_type": row["meal_type"],
+                "meal_id": row["meal_id"],
+                "meal_name": row["meal_name"],
+                "items": [],
+                "total_calories": 0
+            }
+        if row["item_id"] is not None:
+            entry["items"].append({
+                "id": row["item_id"],
+                "food_id": row["food_id"],
+                "food_name": row["food_name"],
+                "calories": row["calories"],
+                "quantity": row["quantity"]
+            })
+            entry["total_calories"] += row["calories"] * row["quantity"]
+    if entry is not None:
+        yield dumps(entry) + "\n"
+
+
+def iter_export_csv(rows):
+    """Write one CSV line per item, in the same layout as db/meal-history.py."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    for row in rows:
+        if row["item_id"] is not None:
+            writer.writerow([
+                row["meal_date"], row["meal_type"], row["meal_name"] or "",
+                row["food_name"], row["calories"], row["quantity"],
+                int(row["calories"] * row["quantity"])
+            ])
+        else:
+            writer.writerow([row["meal_date"], row["meal_type"], row["meal_name"] or "", "", 0, 0, 0])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def chunked(lines, size: int = EXPORT_CHUNK_SIZE):
+    """Join small strings into chunks of about `size` bytes."""
+    parts = []
+    length = 0
+    for line in lines:
+        parts.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+            length = 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+@log_bp.route("/export", methods=["GET"])
+@login_required
+def export_log():
+    """Stream the user's full meal log as NDJSON or CSV.
+
+    The body is generated from one cursor while it is sent, so memory use
+    does not grow with history length. With compress=gzip the export is
+    produced as a .gz file on the fly.
+    """
+    fmt = request.args.get("format", "ndjson")
+    compress = request.args.get("compress")
+
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    if compress not in (None, "gzip"):
+        return jsonify({"error": "Invalid compress value. Must be gzip"}), 400
+
+    rows = iter_export_rows(g.user["id"])
+    if fmt == "ndjson":
+        body = chunked(iter_export_ndjson(rows, current_app.json.dumps))
+    else:
+        body = chunked(iter_export_csv(rows))
+
+    filename = f"meal-log-{get_pacific_today().isoformat()}.{fmt}"
+    mimetype = EXPORT_FORMATS[fmt]
+
+    if compress == "gzip":
+        body = compress_stream(body, "gzip", current_app.config.get("COMPRESS_LEVEL", 6))
+        filename += ".gz"
+        mimetype = "application/gzip"
+
+    response = Response(
+        body,
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+    # Release the cursor's read snapshot even if the client disconnects early
+    response.call_on_close(rows.close)
+    return response
+
+
+@log_bp.route("/copy", methods=["POST"])
+@login_required
+def copy_log():
+    """Copy a day's entries (or one entry) onto a range of target dates.
+
+    Body: source_date or log_id, target_start, optional target_end (defaults
+    to target_start) and optional meal_types (defaults to every type logged
+    on the source day, or the entry's type for log_id). Existing target
+    entries of the same meal type are replaced, as with POST /api/log. All
+    targets are written with set-based statements in one transaction.
+    """
+    data = request.get_json()
+
+    if not data:
+        return jsonify({"error": "Request body required"}), 400
+
+    user_id = g.user["id"]
+    log_id = data.get("log_id")
+    source_date = data.get("source_date")
+
+    if (log_id is None) == (source_date is None):
+        return jsonify({"error": "Provide either source_date or log_id"}), 400
+
+    meal_types = data.get("meal_types") or MEAL_TYPES
+    if not isinstance(meal_types, list) or any(t not in MEAL_TYPES for t in meal_types):
+        return jsonify({"error": f"Invalid meal types. Must be among: {', '.join(MEAL_TYPES)}"}), 400
+
+    if log_id is not None:
+        log = query_db(
+            "SELECT user_id, meal_date, meal_type FROM user_meal_log WHERE id = ?",
+            (log_id,),
+            one=True
+        ) or get_archived_entry(log_id)
+
+        if not log:
+            return jsonify({"error": "Log entry not found"}), 404
+
+        if log["user_id"] != user_id:
+            return jsonify({"error": "Not authorized"}), 403
+
+        source_date = log["meal_date"]
+        meal_types = [log["meal_type"]]
+
+    target_start = data.get("target_start")
+    target_end = data.get("target_end") or target_start
+
+    try:
+        datetime.strptime(source_date, "%Y-%m-%d")
+        start = datetime.strptime(target_start, "%Y-%m-%d").date()
+        end = datetime.strptime(target_end, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    if end < start or (end - start).days >= COPY_MAX_DAYS:
+        return jsonify({"error": f"target_end must be on or after target_start and within {COPY_MAX_DAYS} days"}), 400
+
+    targets = [
+        (start + timedelta(days=i)).isoformat()
+        for i in range((end - start).days + 1)
+    ]
+    targets = [d for d in targets if d != source_date]
+
+    if not targets:
+        return jsonify({"error": "Target range only contains the source date"}), 400
+
+    restore_days(user_id, [source_date, *targets])
+
+    targets_json = json.dumps(targets)
+    source = (user_id, source_date, json.dumps(meal_types))
+
+    conn = get_db()
+    try:
+        # Only the meal types actually logged on the source day are copied
+        copied_types = [
+            row["meal_type"] for row in conn.execute(
+                """
+                SELECT meal_type FROM user_meal_log
+                WHERE user_id = ? AND meal_date = ? AND meal_type IN (SELECT value FROM json_each(?))
+                """,
+                source
+            )
+        ]
+
+        if not copied_types:
+            return jsonify({"error": "No log entries to copy"}), 404
+
+        types_json = json.dumps(copied_types)
+
+        conn.execute(
+            """
+            INSERT INTO user_meal_log (user_id, meal_date, meal_type, meal_id)
+            SELECT s.user_id, t.value, s.meal_type, s.meal_id
+            FROM user_meal_log s, json_each(?) t
+            WHERE s.user_id = ? AND s.meal_date = ? AND s.meal_type IN (SELECT value FROM json_each(?))
+            ON CONFLICT (user_id, meal_date, meal_type) DO UPDATE
+            SET meal_id = excluded.meal_id, updated_at = strftime('%Y-%m-%dT%H:%M:%fZ','now')
+            """,
+            (targets_json, *source)
+        )
+
+        conn.execute(
+            """
+            DELETE FROM user_meal_log_items
+            WHERE log_id IN (
+                SELECT id FROM user_meal_log
+                WHERE user_id = ?
+                  AND meal_date IN (SELECT value FROM json_each(?))
+                  AND meal_type IN (SELECT value FROM json_each(?))
+            )
+            """,
+            (user_id, targets_json, types_json)
+        )
+
+        conn.execute(
+            """
+            INSERT INTO user_meal_log_items (log_id, food_id, quantity)
+            SELECT l.id, si.food_id, si.quantity
+            FROM user_meal_log s
+            JOIN user_meal_log_items si ON si.log_id = s.id
+            JOIN user_meal_log l ON l.user_id = s.user_id AND l.meal_type = s.meal_type
+            WHERE s.user_id = ? AND s.meal_date = ? AND s.meal_type IN (SELECT value FROM json_each(?))
+              AND l.meal_date IN (SELECT value FROM json_each(?))
+            ORDER BY l.id, si.id
+            """,
+            (*source, targets_json)
+        )
+
+        copied = conn.execute(
+            """
+            SELECT l.id, l.meal_date, l.meal_type, m.name AS meal_name,
+                   COUNT(li.id) AS item_count,
+                   COALESCE(SUM(f.calories * li.quantity), 0) AS total_calories
+            FROM user_meal_log l
+            LEFT JOIN meals m ON m.id = l.meal_id
+            LEFT JOIN user_meal_log_items li ON li.log_id = l.id
+            LEFT JOIN foods f ON f.id = li.food_id
+            WHERE l.user_id = ?
+              AND l.meal_date IN (SELECT value FROM json_each(?))
+              AND l.meal_type IN (SELECT value FROM json_each(?))
+            GROUP BY l.id
+            ORDER BY l.meal_date, l.id
+            """,
+            (user_id, targets_json, types_json)
+        ).fetchall()
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    after_log_write(user_id, targets)
+
+    return jsonify({"source_date": source_date, "copied": copied}), 201
+
+
 @log_bp.route("/<int:log_id>", methods=["GET"])
 @login_required
 def get_log_entry(log_id: int):
@@ -155,7 +871,23 @@ def get_log_entry(log_id: int):
     )
 
     if not log:
-        return jsonify({"error": "Log entry not found"}), 404
+        archived = get_archived_entry(log_id)
+
+        if not archived:
+            return jsonify({"error": "Log entry not found"}), 404
+
+        if archived["user_id"] != g.user["id"]:
+            return jsonify({"error": "Not authorized"}), 403
+
+        return jsonify({
+            "id": archived["id"],
+            "meal_date": archived["meal_date"],
+            "meal_type": archived["meal_type"],
+            "meal_id": archived["meal_id"],
+            "meal_name": archived["meal_name"],
+            "items": archived["items"],
+            "total_calories": sum(i["calories"] * i["quantity"] for i in archived["items"])
+        })
 
     if log["user_id"] != g.user["id"]:
         return jsonify({"error": "Not authorized"}), 403
@@ -192,6 +924,9 @@ def create_or_update_log():
     user_id = g.user["id"]
     meal_id = None
 
+    # An archived day is moved back whole, so the write merges with it
+    restore_days(user_id, [meal_date])
+
     conn = get_db()
     try:
         if meal_name:
@@ -218,6 +953,8 @@ def create_or_update_log():
                             (meal_id, food_id, quantity)
                         )
 
+                refresh_meal_totals(conn, meal_id)
+
         existing_log = conn.execute(
             "SELECT id FROM user_meal_log WHERE user_id = ? AND meal_date = ? AND meal_type = ?",
             (user_id, meal_date, meal_type)
@@ -227,8 +964,8 @@ def create_or_update_log():
             log_id = existing_log["id"]
 
             conn.execute(
-                "UPDATE user_meal_log SET meal_id = ?, updated_at = ? WHERE id = ?",
-                (meal_id, datetime.now(PACIFIC_TZ).isoformat(), log_id)
+                "UPDATE user_meal_log SET meal_id = ?, updated_at = strftime('%Y-%m-%dT%H:%M:%fZ','now') WHERE id = ?",
+                (meal_id, log_id)
             )
 
             conn.execute("DELETE FROM user_meal_log_items WHERE log_id = ?", (log_id,))
@@ -252,6 +989,8 @@ def create_or_update_log():
     finally:
         conn.close()
 
+    after_log_write(user_id, [meal_date])
+
     return jsonify(get_log_entry_with_items(log_id)), 201
 
 
@@ -263,7 +1002,7 @@ def delete_log_entry(log_id: int):
         "SELECT user_id, meal_date FROM user_meal_log WHERE id = ?",
         (log_id,),
         one=True
-    )
+    ) or get_archived_entry(log_id)
 
     if not log:
         return jsonify({"error": "Log entry not found"}), 404
@@ -271,8 +1010,93 @@ def delete_log_entry(log_id: int):
     if log["user_id"] != g.user["id"]:
         return jsonify({"error": "Not authorized"}), 403
 
+    restore_days(g.user["id"], [log["meal_date"]])
+
     # Allow deleting meals for any date (removed current-date-only restriction)
 
     execute_db("DELETE FROM user_meal_log WHERE id = ?", (log_id,))
+    after_log_write(g.user["id"], [log["meal_date"]])
 
     return jsonify({"success": True})
+
+
+@log_bp.route("", methods=["DELETE"])
+@login_required
+def delete_log_range():
+    """Delete every entry between ?start= and ?end= (inclusive), optionally of one ?meal_type=.
+
+    end defaults to start. Archived days in the range are moved back first,
+    then entries and their items (by cascade) are counted and deleted in
+    one write transaction. Returns the number of entries and items deleted
+    and the dates that changed.
+    """
+    start = request.args.get("start")
+    end = request.args.get("end") or start
+    meal_type = request.args.get("meal_type") or None
+
+    try:
+        # Compared as text in SQL, so normalize "2024-3-1" to "2024-03-01"
+        start = datetime.strptime(start, "%Y-%m-%d").date().isoformat()
+        end = datetime.strptime(end, "%Y-%m-%d").date().isoformat()
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    if end < start:
+        return jsonify({"error": "end must be on or after start"}), 400
+
+    if meal_type is not None and meal_type not in MEAL_TYPES:
+        return jsonify({"error": f"Invalid meal type. Must be one of: {', '.join(MEAL_TYPES)}"}), 400
+
+    user_id = g.user["id"]
+    params = (user_id, start, end, meal_type, meal_type)
+
+    deleted = None
+    for _ in range(RANGE_DELETE_ATTEMPTS):
+        restore_days(user_id, get_archived_dates_between(user_id, start, end))
+
+        conn = get_db()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Nothing can archive while the write lock is held, but a day
+            # may have been archived again (or left behind by an interrupted
+            # move) since the restore; a copy left there would resurface
+            if get_archived_dates_between(user_id, start, end):
+                conn.rollback()
+                continue
+
+            counts = conn.execute(
+                """
+                SELECT l.meal_date, COUNT(DISTINCT l.id) AS entries, COUNT(li.id) AS items
+                FROM user_meal_log l
+                LEFT JOIN user_meal_log_items li ON li.log_id = l.id
+                WHERE l.user_id = ? AND l.meal_date BETWEEN ? AND ? AND (? IS NULL OR l.meal_type = ?)
+                GROUP BY l.meal_date
+                """,
+                params
+            ).fetchall()
+
+            conn.execute(
+                """
+                DELETE FROM user_meal_log
+                WHERE user_id = ? AND meal_date BETWEEN ? AND ? AND (? IS NULL OR meal_type = ?)
+                """,
+                params
+            )
+            conn.commit()
+            deleted = {row["meal_date"]: (row["entries"], row["items"]) for row in counts}
+            break
+        finally:
+            conn.close()
+
+    if deleted is None:
+        return jsonify({"error": "Days in the range are being archived; try again"}), 409
+
+    dates = sorted(deleted)
+    if dates:
+        after_log_write(user_id, dates)
+
+    return jsonify({
+        "entries": sum(entries for entries, _ in deleted.values()),
+        "items": sum(items for _, items in deleted.values()),
+        "dates": dates
+    })
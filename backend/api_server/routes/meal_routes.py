@@ -1,59 +1,187 @@
+import json
+
 from flask import Blueprint, request, jsonify
 
 from auth import login_required
 from database import query_db, execute_db, get_db
+from pagination import parse_page_args, split_page
 
 meal_bp = Blueprint("meals", __name__, url_prefix="/api/meals")
 
 
-def get_meal_with_items(meal_id: int) -> dict | None:
-    """Get a meal with its items and total calories."""
-    meal = query_db(
-        "SELECT id, name, description FROM meals WHERE id = ?",
-        (meal_id,),
-        one=True
+# Keyset-paginated template listings. The cursor is the last row's sort key:
+# its name, or "<total_calories>:<name>" for the calories order (see
+# calories_cursor). Calorie bounds are optional (NULL disables them).
+# LIMIT -1 means no limit.
+MEAL_LIST_QUERIES = {
+    "name": """
+        SELECT id, name, description, total_calories, item_count
+        FROM meals
+        WHERE description IS NOT NULL AND description != ''
+          AND (? IS NULL OR total_calories >= ?)
+          AND (? IS NULL OR total_calories <= ?)
+          AND name > ?
+        ORDER BY name
+        LIMIT ?
+    """,
+    "calories": """
+        SELECT id, name, description, total_calories, item_count
+        FROM meals
+        WHERE description IS NOT NULL AND description != ''
+          AND (? IS NULL OR total_calories >= ?)
+          AND (? IS NULL OR total_calories <= ?)
+          AND (total_calories, name) > (?, ?)
+        ORDER BY total_calories, name
+        LIMIT ?
+    """,
+}
+
+
+def calories_cursor(meal: dict) -> str:
+    """Cursor for the calories order, e.g. "350.0:Pasta bake"."""
+    return f"{meal['total_calories']}:{meal['name']}"
+
+
+def parse_calories_cursor(after: str) -> tuple[float, str]:
+    """Split a calories_cursor(); "" starts from the first row.
+
+    Raises ValueError if the calories part is not a number.
+    """
+    if not after:
+        return float("-inf"), ""
+    calories, _, name = after.partition(":")
+    return float(calories), name
+
+
+def refresh_meal_totals(conn, meal_id: int) -> None:
+    """Recompute a meal's stored total_calories and item_count.
+
+    The row is only written when a value changed.
+    """
+    conn.execute(
+        """
+        WITH totals AS (
+            SELECT COALESCE(SUM(f.calories * mi.quantity), 0) AS calories, COUNT(*) AS items
+            FROM meal_items mi
+            JOIN foods f ON f.id = mi.food_id
+            WHERE mi.meal_id = ?
+        )
+        UPDATE meals SET
+            total_calories = (SELECT calories FROM totals),
+            item_count = (SELECT items FROM totals)
+        WHERE id = ? AND (total_calories, item_count) IS NOT (SELECT calories, items FROM totals)
+        """,
+        (meal_id, meal_id)
     )
 
-    if not meal:
-        return None
 
+def get_meal_items(meal_ids: list[int], conn=None) -> dict[int, list]:
+    """Get the items of several meals in one query, keyed by meal id."""
     items = query_db(
         """
-        SELECT mi.id, mi.food_id, f.name as food_name, f.calories, mi.quantity
+        SELECT mi.meal_id, mi.id, mi.food_id, f.name as food_name, f.calories, mi.quantity
         FROM meal_items mi
         JOIN foods f ON f.id = mi.food_id
-        WHERE mi.meal_id = ?
+        WHERE mi.meal_id IN (SELECT value FROM json_each(?))
         """,
-        (meal_id,)
+        (json.dumps(meal_ids),),
+        conn=conn
     )
 
-    items_list = [dict(i) for i in items]
-    total_calories = sum(i["calories"] * i["quantity"] for i in items_list)
+    items_by_meal: dict[int, list] = {meal_id: [] for meal_id in meal_ids}
+    for item in items:
+        items_by_meal[item.pop("meal_id")].append(item)
+    return items_by_meal
+
+
+def with_items(meals: list[dict], conn=None) -> list[dict]:
+    """Attach items to meal rows that already carry their stored totals."""
+    items_by_meal = get_meal_items([meal["id"] for meal in meals], conn)
+    return [
+        {
+            "id": meal["id"],
+            "name": meal["name"],
+            "description": meal["description"],
+            "items": items_by_meal[meal["id"]],
+            "item_count": meal["item_count"],
+            "total_calories": meal["total_calories"]
+        }
+        for meal in meals
+    ]
 
-    return {
-        "id": meal["id"],
-        "name": meal["name"],
-        "description": meal["description"],
-        "items": items_list,
-        "total_calories": total_calories
-    }
+
+def list_meal_templates(conn=None) -> list[dict]:
+    """Get every meal template with its items, ordered by name."""
+    meals = query_db(MEAL_LIST_QUERIES["name"], (None, None, None, None, "", -1), conn=conn)
+    return with_items(meals, conn)
+
+
+def get_meal_with_items(meal_id: int) -> dict | None:
+    """Get a meal with its items and total calories."""
+    meal = query_db(
+        "SELECT id, name, description, total_calories, item_count FROM meals WHERE id = ?",
+        (meal_id,),
+        one=True
+    )
+
+    if not meal:
+        return None
+
+    return with_items([meal])[0]
 
 
 @meal_bp.route("", methods=["GET"])
 @login_required
 def get_meals():
-    """Get all meal templates (only those with descriptions)."""
+    """Get all meal templates (only those with descriptions).
+
+    Supports ?sort=name|calories, ?min_calories=/?max_calories= filters on
+    the stored totals, and keyset pagination with ?after=<cursor>&limit=
+    (the next_cursor of the previous page).
+    """
+    try:
+        page = parse_page_args(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid limit. Must be a positive integer"}), 400
+
+    sort = request.args.get("sort", "name")
+    if sort not in MEAL_LIST_QUERIES:
+        return jsonify({"error": f"Invalid sort. Must be one of: {', '.join(MEAL_LIST_QUERIES)}"}), 400
+
+    try:
+        min_calories, max_calories = (
+            float(request.args[key]) if request.args.get(key) else None
+            for key in ("min_calories", "max_calories")
+        )
+    except ValueError:
+        return jsonify({"error": "Calorie filters must be numbers"}), 400
+
+    if page is None:
+        after, fetch = "", -1
+    else:
+        after, limit = page
+        fetch = limit + 1
+
+    if sort == "name":
+        cursor_args = (after,)
+    else:
+        try:
+            cursor_args = parse_calories_cursor(after)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
     meals = query_db(
-        "SELECT id, name, description FROM meals WHERE description IS NOT NULL AND description != '' ORDER BY name"
+        MEAL_LIST_QUERIES[sort],
+        (min_calories, min_calories, max_calories, max_calories, *cursor_args, fetch)
     )
 
-    result = []
-    for meal in meals:
-        meal_data = get_meal_with_items(meal["id"])
-        if meal_data:
-            result.append(meal_data)
+    if page is None:
+        return jsonify(with_items(meals))
 
-    return jsonify(result)
+    meals, next_cursor = split_page(meals, limit, "name")
+    if next_cursor is not None and sort == "calories":
+        next_cursor = calories_cursor(meals[-1])
+    return jsonify({"items": with_items(meals), "next_cursor": next_cursor})
 
 
 @meal_bp.route("/<int:meal_id>", methods=["GET"])
@@ -111,6 +239,7 @@ def create_meal():
                     (meal_id, food_id, quantity)
                 )
 
+        refresh_meal_totals(conn, meal_id)
         conn.commit()
     finally:
         conn.close()
@@ -0,0 +1,33 @@
+"""Shared fixtures for the API server tests."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(API_DIR))
+
+from meals import create_app  # noqa: E402
+from routes.log_routes import calendar_cache, day_cache  # noqa: E402
+
+
+@pytest.fixture
+def app_config() -> dict:
+    """Config for the client fixture's app; override it in a test module."""
+    return {"COMPRESS_ENABLED": False}
+
+
+@pytest.fixture
+def client(tmp_path, app_config):
+    """A test client on a fresh database, logged in as a new user."""
+    # The caches outlive the app; user ids and versions repeat across tests
+    day_cache.clear()
+    calendar_cache.clear()
+    db_path = tmp_path / "meals.db"
+    app = create_app({"DATABASE": str(db_path), **app_config})
+    client = app.test_client()
+    client.post("/api/auth/register", json={"username": "sync"})
+    client.db_path = db_path
+    return client
@@ -0,0 +1,164 @@
+"""Delta sync (/api/log/changes) over days moved out by db/archive.py."""
+
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import archive as archive_module
+from conftest import API_DIR
+from routes import log_routes
+
+ARCHIVE_SCRIPT = API_DIR.parent.parent / "db" / "archive.py"
+
+OLD_DATES = ["2020-01-01", "2020-01-02", "2020-01-03"]
+RECENT_DATE = "2024-06-01"
+
+
+def add_entry(client, meal_date: str, meal_type: str, food_id: int) -> dict:
+    response = client.post("/api/log", json={
+        "meal_date": meal_date,
+        "meal_type": meal_type,
+        "items": [{"food_id": food_id, "quantity": 2}],
+    })
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def archive(db_path: Path, before: str) -> None:
+    subprocess.run(
+        [sys.executable, str(ARCHIVE_SCRIPT), "--db", str(db_path), "--before", before],
+        check=True,
+        capture_output=True
+    )
+
+
+def full_sync(client, limit: int) -> dict[int, dict]:
+    """Replay /api/log/changes from since=0 the way a client would."""
+    entries: dict[int, dict] = {}
+    since = 0
+    while True:
+        page = client.get(f"/api/log/changes?since={since}&limit={limit}").get_json()
+        for entry in page["updated"]:
+            entries[entry["id"]] = entry
+        for tombstone in page["deleted"]:
+            entries.pop(tombstone["id"], None)
+        since = page["token"]
+        if not page["has_more"]:
+            return entries
+
+
+@pytest.mark.parametrize("limit", [1, 2, 100])
+def test_full_sync_includes_archived_entries(client, limit):
+    food = client.post("/api/foods", json={"name": "Oats", "calories": 150}).get_json()
+    expected = {}
+    for meal_date in OLD_DATES + [RECENT_DATE]:
+        for meal_type in ("breakfast", "dinner"):
+            entry = add_entry(client, meal_date, meal_type, food["id"])
+            expected[entry["id"]] = (meal_date, meal_type)
+
+    archive(client.db_path, before="2021-01-01")
+    assert client.db_path.with_name("meals-archive.db").exists()
+    # The archived days are gone from the hot tables but still readable
+    assert client.get(f"/api/log?date={OLD_DATES[0]}").get_json()["total_calories"] == 600
+
+    entries = full_sync(client, limit)
+
+    assert {log_id: (e["meal_date"], e["meal_type"]) for log_id, e in entries.items()} == expected
+    for entry in entries.values():
+        assert entry["items"][0]["food_name"] == "Oats"
+        assert entry["total_calories"] == 300
+
+
+def test_sync_after_archive_reports_later_deletes(client):
+    food = client.post("/api/foods", json={"name": "Rice", "calories": 200}).get_json()
+    kept = add_entry(client, OLD_DATES[0], "lunch", food["id"])
+    removed = add_entry(client, OLD_DATES[1], "lunch", food["id"])
+
+    archive(client.db_path, before="2021-01-01")
+    token = client.get("/api/log/changes?since=0").get_json()["token"]
+
+    # Deleting an archived entry restores its day first, then deletes it
+    assert client.delete(f"/api/log/{removed['id']}").status_code == 200
+    page = client.get(f"/api/log/changes?since={token}").get_json()
+    assert [tombstone["id"] for tombstone in page["deleted"]] == [removed["id"]]
+
+    assert set(full_sync(client, limit=1)) == {kept["id"]}
+
+
+def test_interrupted_restore_leaves_one_copy_visible(client, monkeypatch):
+    food = client.post("/api/foods", json={"name": "Tea", "calories": 5}).get_json()
+    entry = add_entry(client, OLD_DATES[0], "breakfast", food["id"])
+    archive(client.db_path, before="2021-01-01")
+
+    # The copy back into the hot tables commits, removing the archived copy fails
+    def fail(*args):
+        raise RuntimeError("interrupted")
+    monkeypatch.setattr(archive_module, "delete_archived_days", fail)
+    with pytest.raises(RuntimeError):
+        archive_module.restore_days(1, [OLD_DATES[0]])
+    monkeypatch.undo()
+    assert archive_module.get_archived_dates(1) == [OLD_DATES[0]]
+
+    export = client.get("/api/log/export?format=ndjson").get_data(as_text=True).splitlines()
+    assert len(export) == 1
+    assert set(full_sync(client, limit=100)) == {entry["id"]}
+
+    # The next write to the day finishes the move
+    add_entry(client, OLD_DATES[0], "dinner", food["id"])
+    assert archive_module.get_archived_dates(1) == []
+    assert len(client.get(f"/api/log?date={OLD_DATES[0]}").get_json()["meals"]["dinner"]["items"]) == 1
+
+
+def test_range_delete_covers_archived_days(client, monkeypatch):
+    food = client.post("/api/foods", json={"name": "Soup", "calories": 90}).get_json()
+    kept = [add_entry(client, meal_date, "lunch", food["id"]) for meal_date in OLD_DATES]
+    removed = [add_entry(client, meal_date, "dinner", food["id"]) for meal_date in OLD_DATES]
+    archive(client.db_path, before="2021-01-01")
+    token = client.get("/api/log/changes?since=0").get_json()["token"]
+
+    # Leave the first day in both databases, as an interrupted restore does
+    monkeypatch.setattr(archive_module, "delete_archived_days", lambda *args: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        archive_module.restore_days(1, [OLD_DATES[0]])
+    monkeypatch.undo()
+
+    response = client.delete(f"/api/log?start={OLD_DATES[0]}&end={OLD_DATES[-1]}&meal_type=dinner")
+    assert response.get_json() == {"entries": 3, "items": 3, "dates": OLD_DATES}
+    assert archive_module.get_archived_dates(1) == []
+
+    page = client.get(f"/api/log/changes?since={token}").get_json()
+    assert sorted(tombstone["id"] for tombstone in page["deleted"]) == [entry["id"] for entry in removed]
+    assert set(full_sync(client, limit=100)) == {entry["id"] for entry in kept}
+
+
+def test_restore_skips_write_lock_for_days_not_archived(client):
+    food = client.post("/api/foods", json={"name": "Pear", "calories": 60}).get_json()
+    add_entry(client, OLD_DATES[0], "lunch", food["id"])
+    archive(client.db_path, before="2021-01-01")
+
+    writer = sqlite3.connect(client.db_path, timeout=0)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        assert archive_module.restore_days(1, [RECENT_DATE]) == []
+    finally:
+        writer.rollback()
+        writer.close()
+
+
+def test_empty_day_outside_calendar_skips_archive(client, monkeypatch):
+    food = client.post("/api/foods", json={"name": "Plum", "calories": 30}).get_json()
+    add_entry(client, OLD_DATES[0], "lunch", food["id"])
+    archive(client.db_path, before="2021-01-01")
+    # Loads the user's calendar, archived days included
+    assert client.get("/api/log/dates").get_json()["dates"] == [OLD_DATES[0]]
+
+    opened = []
+    monkeypatch.setattr(log_routes, "get_archived_day", lambda *args: opened.append(args) or [])
+    assert client.get(f"/api/log?date={RECENT_DATE}").get_json()["total_calories"] == 0
+    assert opened == []
+
+    client.get(f"/api/log?date={OLD_DATES[0]}")
+    assert opened == [(1, OLD_DATES[0])]
@@ -0,0 +1,45 @@
+"""Scheduled backups."""
+
+import os
+import time
+
+import backup
+
+
+def wait_for_snapshots(dest, count: int, timeout: float = 5.0) -> list:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        snapshots = backup.list_snapshots(dest)
+        if len(snapshots) >= count:
+            return snapshots
+        time.sleep(0.02)
+    return backup.list_snapshots(dest)
+
+
+def test_scheduler_backs_up_right_away_without_a_recent_snapshot(client, tmp_path):
+    dest = tmp_path / "backups"
+    stop = backup.start_backup_scheduler(dest, interval=3600, sleep=0)
+    try:
+        assert len(wait_for_snapshots(dest, 1)) == 1
+    finally:
+        stop.set()
+
+
+def test_scheduler_waits_out_a_recent_snapshot(client, tmp_path):
+    dest = tmp_path / "backups"
+    recent = backup.backup_database(dest, sleep=0)
+    # An old snapshot is due immediately, a recent one is not
+    old = time.time() - 7200
+    os.utime(recent["path"], (old, old))
+    stop = backup.start_backup_scheduler(dest, interval=3600, sleep=0)
+    try:
+        assert len(wait_for_snapshots(dest, 2)) == 2
+    finally:
+        stop.set()
+
+    stop = backup.start_backup_scheduler(dest, interval=3600, sleep=0)
+    try:
+        time.sleep(0.3)
+        assert len(backup.list_snapshots(dest)) == 2
+    finally:
+        stop.set()
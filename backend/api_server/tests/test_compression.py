@@ -0,0 +1,41 @@
+"""Response compression follows Accept-Encoding."""
+
+import gzip
+import json
+
+import pytest
+
+import compression
+
+
+@pytest.fixture
+def app_config() -> dict:
+    return {}
+
+
+@pytest.fixture
+def client(client):
+    for i in range(40):
+        client.post("/api/foods", json={"name": f"food {i:02d}", "calories": i})
+    return client
+
+
+def test_gzip_when_accepted(client, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    plain = client.get("/api/foods", headers={"Accept-Encoding": "identity"})
+    packed = client.get("/api/foods", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in packed.headers["Vary"]
+    assert json.loads(gzip.decompress(packed.data)) == plain.get_json()
+
+
+def test_small_and_not_modified_responses_stay_plain(client):
+    health = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in health.headers
+
+    etag = client.get("/api/log?date=2024-01-01").headers["ETag"]
+    revalidated = client.get("/api/log?date=2024-01-01", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert revalidated.status_code == 304
+    assert "Content-Encoding" not in revalidated.headers
@@ -0,0 +1,26 @@
+"""Food search: match quality first, then the user's own logging."""
+
+
+def search(client, q: str) -> list[str]:
+    return [food["name"] for food in client.get(f"/api/foods/search?q={q}").get_json()]
+
+
+def test_search_ranks_name_prefix_word_prefix_then_substring(client):
+    for name in ("Yogurt", "Greek yogurt", "Frozen yogurt", "Soy yogurts"):
+        client.post("/api/foods", json={"name": name, "calories": 100})
+    client.post("/api/foods", json={"name": "Rice", "calories": 200})
+
+    assert search(client, "yog") == ["Yogurt", "Frozen yogurt", "Greek yogurt", "Soy yogurts"]
+    assert search(client, "ogu") == ["Frozen yogurt", "Greek yogurt", "Soy yogurts", "Yogurt"]
+
+
+def test_logging_a_food_moves_it_up_right_away(client):
+    client.post("/api/foods", json={"name": "Grapes", "calories": 60})
+    yogurt = client.post("/api/foods", json={"name": "Greek yogurt", "calories": 100}).get_json()
+    assert search(client, "gr") == ["Grapes", "Greek yogurt"]
+
+    client.post("/api/log", json={
+        "meal_date": "2024-01-01", "meal_type": "lunch", "items": [{"food_id": yogurt["id"], "quantity": 1}]
+    })
+
+    assert search(client, "gr") == ["Greek yogurt", "Grapes"]
@@ -0,0 +1,48 @@
+"""GET /api/log/dates calendar formats, scopes and ETags."""
+
+import pytest
+
+DATES = ["2024-02-28", "2024-02-29", "2024-03-01", "2024-03-02", "2024-03-09", "2025-01-01"]
+
+
+@pytest.fixture
+def client(client):
+    food = client.post("/api/foods", json={"name": "Egg", "calories": 70}).get_json()
+    for meal_date in DATES:
+        client.post("/api/log", json={
+            "meal_date": meal_date, "meal_type": "breakfast", "items": [{"food_id": food["id"], "quantity": 1}]
+        })
+    return client
+
+
+def test_formats_describe_the_same_days(client):
+    assert client.get("/api/log/dates").get_json() == {"dates": DATES}
+    assert client.get("/api/log/dates?format=ranges").get_json()["ranges"] == [
+        ["2024-02-28", "2024-03-02"], ["2024-03-09", "2024-03-09"], ["2025-01-01", "2025-01-01"]
+    ]
+    # Bit d-1 of a little-endian 4-byte mask is day d
+    assert client.get("/api/log/dates?format=bitmap&year=2024&month=3").get_json()["months"] == {
+        "2024-03": "AwEAAA=="
+    }
+
+
+def test_scopes(client):
+    assert client.get("/api/log/dates?year=2025").get_json() == {"dates": ["2025-01-01"]}
+    assert client.get("/api/log/dates?year=2024&month=2").get_json() == {"dates": DATES[:2]}
+    assert client.get("/api/log/dates?month=2").status_code == 400
+
+
+def test_etag_varies_by_format_and_scope_and_moves_on_writes(client):
+    etags = {
+        query: client.get(f"/api/log/dates{query}").headers["ETag"]
+        for query in ("", "?format=bitmap", "?format=ranges", "?year=2024", "?year=2024&month=3")
+    }
+    assert len(set(etags.values())) == len(etags)
+
+    response = client.get("/api/log/dates?year=2024", headers={"If-None-Match": etags["?year=2024"]})
+    assert response.status_code == 304
+
+    client.delete("/api/log?start=2024-03-09")
+    response = client.get("/api/log/dates?year=2024", headers={"If-None-Match": etags["?year=2024"]})
+    assert response.status_code == 200
+    assert "2024-03-09" not in response.get_json()["dates"]
@@ -0,0 +1,61 @@
+"""Daily log ETags: which writes move them and which must not."""
+
+import sqlite3
+
+
+def day_etag(client, meal_date: str) -> str:
+    response = client.get(f"/api/log?date={meal_date}")
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_unchanged_day_revalidates_with_304(client):
+    etag = day_etag(client, "2024-01-01")
+    response = client.get("/api/log?date=2024-01-01", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_catalog_additions_keep_existing_day_etag(client):
+    food = client.post("/api/foods", json={"name": "Toast", "calories": 80}).get_json()
+    client.post("/api/meals", json={
+        "name": "Breakfast", "description": "Daily", "items": [{"food_id": food["id"], "quantity": 1}]
+    })
+    client.post("/api/log", json={
+        "meal_date": "2024-01-01", "meal_type": "breakfast", "meal_name": "Breakfast",
+        "items": [{"food_id": food["id"], "quantity": 1}],
+    })
+    etag = day_etag(client, "2024-01-01")
+
+    client.post("/api/foods", json={"name": "Jam", "calories": 50})
+    client.post("/api/meals", json={
+        "name": "Snack", "description": "Any time", "items": [{"food_id": food["id"], "quantity": 2}]
+    })
+    # Stored meal totals are not shown on the day
+    conn = sqlite3.connect(client.db_path)
+    with conn:
+        conn.execute("UPDATE meals SET total_calories = 0, item_count = 0 WHERE name = 'Breakfast'")
+    conn.close()
+
+    assert day_etag(client, "2024-01-01") == etag
+
+
+def test_editing_a_shown_food_or_meal_changes_etag(client):
+    food = client.post("/api/foods", json={"name": "Tea", "calories": 5}).get_json()
+    client.post("/api/log", json={
+        "meal_date": "2024-01-01", "meal_type": "breakfast", "meal_name": "Morning",
+        "items": [{"food_id": food["id"], "quantity": 1}],
+    })
+    etag = day_etag(client, "2024-01-01")
+
+    conn = sqlite3.connect(client.db_path)
+    with conn:
+        conn.execute("UPDATE foods SET calories = 10 WHERE id = ?", (food["id"],))
+    calories_etag = day_etag(client, "2024-01-01")
+    assert calories_etag != etag
+
+    with conn:
+        conn.execute("UPDATE meals SET name = 'Early' WHERE name = 'Morning'")
+    conn.close()
+    assert day_etag(client, "2024-01-01") != calories_etag
+    assert client.get("/api/log?date=2024-01-01").get_json()["meals"]["breakfast"]["meal_name"] == "Early"
@@ -0,0 +1,96 @@
+"""Keyset pagination: every row once, in order, across pages."""
+
+import sqlite3
+
+
+def collect(client, path: str, limit: int, key: str = "items", **params) -> list:
+    """Follow next_cursor from the first page to the last."""
+    items = []
+    after = ""
+    while True:
+        page = client.get(path, query_string={**params, "after": after, "limit": limit}).get_json()
+        assert len(page[key]) <= limit
+        items.extend(page[key])
+        if page["next_cursor"] is None:
+            return items
+        after = page["next_cursor"]
+
+
+def test_foods_pages_cover_the_catalog_once(client):
+    names = [f"food {i:02d}" for i in range(7)]
+    for name in reversed(names):
+        client.post("/api/foods", json={"name": name, "calories": 10})
+
+    for limit in (1, 3, 7, 10):
+        assert [food["name"] for food in collect(client, "/api/foods", limit)] == names
+
+    # Without after/limit the unpaginated list comes back
+    assert [food["name"] for food in client.get("/api/foods").get_json()] == names
+
+
+def test_log_dates_pages_count_each_day_once(client):
+    food = client.post("/api/foods", json={"name": "Oats", "calories": 150}).get_json()
+    dates = ["2024-01-01", "2024-01-02", "2024-01-05", "2024-02-01"]
+    for meal_date in dates:
+        for meal_type in ("breakfast", "lunch"):
+            client.post("/api/log", json={
+                "meal_date": meal_date, "meal_type": meal_type,
+                "items": [{"food_id": food["id"], "quantity": 1}],
+            })
+
+    for limit in (1, 2, 3, 4):
+        assert collect(client, "/api/log/dates", limit, key="dates") == dates
+
+    page = client.get("/api/log/dates?after=2024-01-02&limit=10").get_json()
+    assert page == {"dates": ["2024-01-05", "2024-02-01"], "next_cursor": None}
+
+
+def test_invalid_page_limits(client):
+    for limit in ("0", "-1", "ten"):
+        assert client.get(f"/api/foods?limit={limit}").status_code == 400
+        assert client.get(f"/api/log/dates?limit={limit}").status_code == 400
+    assert client.get("/api/log/dates?limit=5&format=bitmap").status_code == 400
+
+
+def create_meals(client, calories_by_name: dict[str, int]) -> None:
+    for name, calories in calories_by_name.items():
+        food = client.post("/api/foods", json={"name": f"{name} food", "calories": calories}).get_json()
+        response = client.post("/api/meals", json={
+            "name": name, "description": "template", "items": [{"food_id": food["id"], "quantity": 1}]
+        })
+        assert response.status_code == 201
+
+
+def test_meals_by_calories_pages_ties_in_name_order(client):
+    create_meals(client, {"Eggs": 300, "Apple": 100, "Soup": 300, "Toast": 200, "Bagel": 300})
+
+    meals = collect(client, "/api/meals", limit=2, sort="calories")
+
+    assert [(m["total_calories"], m["name"]) for m in meals] == [
+        (100, "Apple"), (200, "Toast"), (300, "Bagel"), (300, "Eggs"), (300, "Soup")
+    ]
+
+
+def test_meals_by_calories_cursor_survives_cursor_meal_changes(client):
+    create_meals(client, {"Apple": 100, "Toast": 200, "Eggs": 300, "Soup": 400})
+    page = client.get("/api/meals?sort=calories&limit=2").get_json()
+    assert [m["name"] for m in page["items"]] == ["Apple", "Toast"]
+
+    # The meal the cursor points at is deleted, then another moves below it
+    conn = sqlite3.connect(client.db_path)
+    with conn:
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("DELETE FROM meals WHERE name = 'Toast'")
+        conn.execute("UPDATE meals SET total_calories = 50 WHERE name = 'Eggs'")
+    conn.close()
+
+    rest = client.get("/api/meals", query_string={
+        "sort": "calories", "limit": 2, "after": page["next_cursor"]
+    }).get_json()
+    assert [m["name"] for m in rest["items"]] == ["Soup"]
+    assert rest["next_cursor"] is None
+
+
+def test_meals_invalid_calories_cursor(client):
+    response = client.get("/api/meals?sort=calories&after=lots:Toast")
+    assert response.status_code == 400
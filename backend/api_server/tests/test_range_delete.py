@@ -0,0 +1,72 @@
+"""DELETE /api/log?start=&end=: inclusive bounds, meal type filter, validation."""
+
+DATES = ["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-04"]
+
+
+def logged(client) -> dict[str, list[str]]:
+    """{date: [meal types]} for every logged day."""
+    days = {}
+    for meal_date in client.get("/api/log/dates").get_json()["dates"]:
+        meals = client.get(f"/api/log?date={meal_date}").get_json()["meals"]
+        days[meal_date] = sorted(meal_type for meal_type, meal in meals.items() if meal["items"])
+    return days
+
+
+def fill(client) -> None:
+    food = client.post("/api/foods", json={"name": "Bread", "calories": 80}).get_json()
+    for meal_date in DATES:
+        for meal_type in ("breakfast", "dinner"):
+            client.post("/api/log", json={
+                "meal_date": meal_date, "meal_type": meal_type,
+                "items": [{"food_id": food["id"], "quantity": 1}, {"food_id": food["id"], "quantity": 2}],
+            })
+
+
+def test_range_bounds_are_inclusive(client):
+    fill(client)
+
+    response = client.delete("/api/log?start=2024-03-02&end=2024-03-03")
+
+    assert response.get_json() == {"entries": 4, "items": 8, "dates": ["2024-03-02", "2024-03-03"]}
+    assert list(logged(client)) == ["2024-03-01", "2024-03-04"]
+
+
+def test_end_defaults_to_start_and_meal_type_filters(client):
+    fill(client)
+
+    response = client.delete("/api/log?start=2024-03-04&meal_type=dinner")
+
+    assert response.get_json() == {"entries": 1, "items": 2, "dates": ["2024-03-04"]}
+    assert logged(client)["2024-03-04"] == ["breakfast"]
+    assert logged(client)["2024-03-03"] == ["breakfast", "dinner"]
+
+
+def test_empty_range_deletes_nothing(client):
+    fill(client)
+
+    response = client.delete("/api/log?start=2024-02-01&end=2024-02-29")
+
+    assert response.get_json() == {"entries": 0, "items": 0, "dates": []}
+    assert list(logged(client)) == DATES
+
+
+def test_unpadded_dates_cover_the_same_days(client):
+    fill(client)
+
+    response = client.delete("/api/log?start=2024-3-1&end=2024-3-2")
+
+    assert response.get_json()["dates"] == ["2024-03-01", "2024-03-02"]
+    assert list(logged(client)) == ["2024-03-03", "2024-03-04"]
+
+
+def test_invalid_ranges_are_rejected(client):
+    fill(client)
+
+    for query in (
+        "start=2024-03-03&end=2024-03-02",
+        "end=2024-03-02",
+        "start=2024-03-32",
+        "start=2024-03-01&meal_type=brunch",
+    ):
+        assert client.delete(f"/api/log?{query}").status_code == 400
+    assert list(logged(client)) == DATES
@@ -0,0 +1,73 @@
+"""Logout revokes session tokens, in both session modes."""
+
+import sqlite3
+
+import pytest
+
+import auth
+
+
+@pytest.fixture
+def app_config(monkeypatch) -> dict:
+    # Cached generations outlive the app; user ids repeat across tests
+    monkeypatch.setattr(auth, "_generations", {})
+    return {"COMPRESS_ENABLED": False, "SESSION_MODE": "signed", "SESSION_SECRET": "test-secret"}
+
+
+@pytest.fixture
+def signed_app(client):
+    app = client.application
+    app.db_path = client.db_path
+    return app
+
+
+def login(app):
+    client = app.test_client()
+    assert client.post("/api/auth/login", json={"username": "sync"}).status_code == 200
+    return client
+
+
+def replay(app, token: str):
+    """A client that only has an old session cookie."""
+    client = app.test_client()
+    client.set_cookie("session_token", token)
+    return client
+
+
+@pytest.mark.parametrize("app_config", [{"COMPRESS_ENABLED": False}])
+def test_db_session_logout_rejects_the_old_token(client):
+    token = client.get_cookie("session_token").value
+    assert client.get("/api/auth/me").status_code == 200
+
+    assert client.post("/api/auth/logout").status_code == 200
+
+    assert replay(client.application, token).get("/api/auth/me").status_code == 401
+
+
+def test_signed_logout_signs_out_every_device(signed_app):
+    phone, laptop = login(signed_app), login(signed_app)
+    token = phone.get_cookie("session_token").value
+    assert token.startswith(auth.SIGNED_TOKEN_VERSION)
+    assert laptop.get("/api/auth/me").status_code == 200
+
+    assert phone.post("/api/auth/logout").status_code == 200
+
+    assert replay(signed_app, token).get("/api/auth/me").status_code == 401
+    assert laptop.get("/api/auth/me").status_code == 401
+    # Logging in again issues a token of the new generation
+    assert login(signed_app).get("/api/auth/me").status_code == 200
+
+
+def test_signed_revocation_by_another_process_applies_after_ttl(signed_app):
+    client = login(signed_app)
+    assert client.get("/api/auth/me").status_code == 200
+
+    conn = sqlite3.connect(signed_app.db_path)
+    with conn:
+        conn.execute("UPDATE users SET session_generation = session_generation + 1")
+    conn.close()
+
+    # Still trusted from the cache within the TTL, rejected once it expires
+    assert client.get("/api/auth/me").status_code == 200
+    signed_app.config["SESSION_GENERATION_TTL"] = 0
+    assert client.get("/api/auth/me").status_code == 401
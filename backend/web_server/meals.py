@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
-"""Meal Tracker Web Server - Serves static frontend files and proxies API requests."""
+"""Meal Tracker Web Server - Serves static frontend files and proxies API requests.
+
+With --api-mode inprocess the API server's Flask app is imported and
+mounted under /api in this process instead, so API calls skip the extra
+HTTP hop through the proxy.
+"""
 
 import argparse
+import importlib.util
 import logging
 from pathlib import Path
 
@@ -16,11 +22,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+API_SERVER_DIR = Path(__file__).resolve().parent.parent / "api_server"
+API_MODES = ["proxy", "inprocess"]
+
+
+def load_api_app() -> Flask:
+    """Import backend/api_server/meals.py and build its app in this process."""
+    # Both servers' entry points are named meals.py, so load it under another name
+    spec = importlib.util.spec_from_file_location("api_server_meals", API_SERVER_DIR / "meals.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.create_app()
+
+
+def mount_api(web_wsgi, api_wsgi):
+    """WSGI dispatcher sending /api and /api/* to the API app, the rest to web_wsgi.
 
-def create_app(static_folder: str = "static", api_url: str = "http://localhost:5001") -> Flask:
+    The path is passed through unchanged because the API's routes already
+    include the /api prefix.
+    """
+    def dispatch(environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path == "/api" or path.startswith("/api/"):
+            return api_wsgi(environ, start_response)
+        return web_wsgi(environ, start_response)
+
+    return dispatch
+
+
+def create_app(static_folder: str = "static", api_url: str = "http://localhost:5001", api_mode: str = "proxy") -> Flask:
     """Create and configure the Flask application."""
     app = Flask(__name__, static_folder=static_folder, static_url_path="")
 
+    if api_mode == "inprocess":
+        app.wsgi_app = mount_api(app.wsgi_app, load_api_app())
+
     @app.route("/api/<path:path>", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
     def proxy_api(path):
         """Proxy all /api/* requests to the API server."""
@@ -30,22 +66,38 @@ def create_app(static_folder: str = "static", api_url: str = "http://localhost:5
             url = f"{url}?{request.query_string.decode('utf-8')}"
         logger.info(f"Proxying {request.method} /api/{path} -> {url}")
 
-        # Forward the request
+        # Forward the request; without an explicit Accept-Encoding, requests
+        # would advertise its own and the API could gzip for a client that
+        # never asked for it
+        forward_headers = {k: v for k, v in request.headers if k.lower() not in ['host', 'content-length']}
+        forward_headers.setdefault('Accept-Encoding', 'identity')
+
         try:
             resp = requests.request(
                 method=request.method,
                 url=url,
-                headers={k: v for k, v in request.headers if k.lower() not in ['host', 'content-length']},
+                headers=forward_headers,
                 data=request.get_data(),
                 cookies=request.cookies,
-                allow_redirects=False
+                allow_redirects=False,
+                stream=True
             )
 
-            # Build response
-            excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
+            # Build response, passing compressed bodies through untouched
+            # (the browser's Accept-Encoding was forwarded above)
+            excluded_headers = ['content-length', 'transfer-encoding', 'connection']
             headers = [(k, v) for k, v in resp.raw.headers.items() if k.lower() not in excluded_headers]
 
-            response = Response(resp.content, resp.status_code, headers)
+            if resp.headers.get('Content-Type', '').startswith('text/event-stream'):
+                # Relay each chunk of an event stream as it arrives rather than
+                # reading a body that never ends, and stop reading from the API
+                # when the browser disconnects
+                body = resp.raw.stream(decode_content=False)
+                response = Response(body, resp.status_code, headers)
+                response.headers['X-Accel-Buffering'] = 'no'
+                response.call_on_close(resp.close)
+            else:
+                response = Response(resp.raw.read(decode_content=False), resp.status_code, headers)
 
             # Forward cookies from API server
             for cookie in resp.cookies:
@@ -92,14 +144,23 @@ def main():
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind to (default: 127.0.0.1)")
     parser.add_argument("--static", type=str, default="static", help="Static files directory (default: static)")
     parser.add_argument("--api-url", type=str, default="http://localhost:5001", help="API server URL (default: http://localhost:5001)")
+    parser.add_argument(
+        "--api-mode",
+        choices=API_MODES,
+        default="proxy",
+        help="proxy: forward /api to --api-url; inprocess: serve the API from this process (default: proxy)"
+    )
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
 
     args = parser.parse_args()
 
-    app = create_app(args.static, args.api_url)
+    app = create_app(args.static, args.api_url, args.api_mode)
     logger.info(f"Starting web server on http://{args.host}:{args.port}")
     logger.info(f"Serving static files from: {Path(args.static).absolute()}")
-    logger.info(f"Proxying API requests to: {args.api_url}")
+    if args.api_mode == "inprocess":
+        logger.info(f"Serving API in-process from: {API_SERVER_DIR}")
+    else:
+        logger.info(f"Proxying API requests to: {args.api_url}")
     app.run(host=args.host, port=args.port, debug=args.debug)
 
 
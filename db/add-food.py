@@ -4,23 +4,22 @@
 import argparse
 import sqlite3
 import sys
-from pathlib import Path
+
+from dbutil import add_database_argument, connect, require_database
 
 
 def main():
     parser = argparse.ArgumentParser(description="Add a new food to the database")
     parser.add_argument("name", help="Name of the food")
     parser.add_argument("calories", type=int, help="Calories per serving")
+    add_database_argument(parser)
     args = parser.parse_args()
 
-    db_path = Path(__file__).parent / "meals.db"
-
-    if not db_path.exists():
-        print(f"Error: Database not found at {db_path}", file=sys.stderr)
-        sys.exit(1)
+    db_path = args.db
+    require_database(db_path)
 
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO foods (name, calories) VALUES (?, ?)",
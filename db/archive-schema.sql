@@ -0,0 +1,24 @@
+-- Archive database for cold meal log history. db/archive.py creates it
+-- next to the main database (meals.db -> meals-archive.db) and moves days
+-- older than a horizon into it; the API server reads it when a day is not
+-- in the main database and moves a day back before it is written.
+
+-- One row per user and day. entries is a JSON array of that day's log
+-- entries, each with its items, names and calories as of archiving:
+-- [{"id", "meal_type", "meal_id", "meal_name", "created_at", "updated_at",
+--   "items": [{"id", "food_id", "food_name", "calories", "quantity"}]}]
+CREATE TABLE IF NOT EXISTS archived_days (
+    user_id         INTEGER NOT NULL,
+    meal_date       TEXT NOT NULL,
+    total_calories  REAL NOT NULL,
+    entries         TEXT NOT NULL,
+    archived_at     TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    PRIMARY KEY (user_id, meal_date)
+) WITHOUT ROWID;
+
+-- Finds the archived day of an entry by its original user_meal_log id
+CREATE TABLE IF NOT EXISTS archived_log_ids (
+    log_id          INTEGER PRIMARY KEY,
+    user_id         INTEGER NOT NULL,
+    meal_date       TEXT NOT NULL
+);
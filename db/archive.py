@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Move old meal log days into the archive database.
+
+Days older than the horizon are copied into meals-archive.db (next to the
+database, see archive-schema.sql) as one JSON row per user and day, then
+deleted from user_meal_log along with their items. The API server keeps
+serving archived days from the archive and moves a day back when it is
+edited. Each user is archived while holding the main database's write lock
+briefly, so this is safe while the server is running. Run maintain.py
+afterwards to return the freed pages to the filesystem.
+
+The two databases cannot share a transaction. A user's days are copied
+into the archive and committed first, checked, and only then deleted from
+the main database. If a run is interrupted in between, the days are in
+both databases; the server reads the main copy, and running again
+replaces the archived copy and finishes the move.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+from dbutil import add_database_argument, archive_file, connect, pacific_today, require_database
+
+ARCHIVE_SCHEMA_PATH = Path(__file__).parent / "archive-schema.sql"
+
+# One archived_days row per day, entries built as archive-schema.sql describes
+ARCHIVE_DAYS_SQL = """
+    SELECT user_id, meal_date, SUM(calories), json_group_array(json(entry))
+    FROM (
+        SELECT l.user_id, l.meal_date,
+               COALESCE(SUM(f.calories * li.quantity), 0) AS calories,
+               json_object(
+                   'id', l.id,
+                   'meal_type', l.meal_type,
+                   'meal_id', l.meal_id,
+                   'meal_name', m.name,
+                   'created_at', l.created_at,
+                   'updated_at', l.updated_at,
+                   'items', json_group_array(json_object(
+                       'id', li.id,
+                       'food_id', li.food_id,
+                       'food_name', f.name,
+                       'calories', f.calories,
+                       'quantity', li.quantity
+                   )) FILTER (WHERE li.id IS NOT NULL)
+               ) AS entry
+        FROM user_meal_log l
+        LEFT JOIN meals m ON m.id = l.meal_id
+        LEFT JOIN user_meal_log_items li ON li.log_id = l.id
+        LEFT JOIN foods f ON f.id = li.food_id
+        WHERE l.user_id = ? AND l.meal_date < ?
+        GROUP BY l.id
+        ORDER BY l.meal_date, l.id
+    )
+    GROUP BY user_id, meal_date
+"""
+
+
+def create_archive(archive_path):
+    """Create the archive database (or add missing tables) in WAL mode."""
+    conn = sqlite3.connect(archive_path)
+    try:
+        conn.executescript(ARCHIVE_SCHEMA_PATH.read_text())
+        conn.execute("PRAGMA journal_mode = WAL")
+    finally:
+        conn.close()
+
+
+def archive_user(conn, archive, user_id, cutoff):
+    """Archive one user's days before cutoff; returns (days, entries).
+
+    conn holds the main database's write lock throughout, so the server
+    cannot change the days between the copy and the delete.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        log_rows = conn.execute(
+            "SELECT id, user_id, meal_date FROM user_meal_log WHERE user_id = ? AND meal_date < ?",
+            (user_id, cutoff)
+        ).fetchall()
+        if not log_rows:
+            conn.execute("ROLLBACK")
+            return 0, 0
+
+        last_change = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM user_meal_log_changes WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()[0]
+        days = conn.execute(ARCHIVE_DAYS_SQL, (user_id, cutoff)).fetchall()
+        log_ids = json.dumps([row[0] for row in log_rows])
+        dates = json.dumps([day[1] for day in days])
+
+        with archive:
+            # Copies left by an interrupted run or restore are replaced;
+            # drop ids of entries they had that the current days lack
+            archive.execute(
+                """
+                DELETE FROM archived_log_ids WHERE log_id IN (
+                    SELECT json_extract(e.value, '$.id')
+                    FROM archived_days d, json_each(d.entries) e
+                    WHERE d.user_id = ? AND d.meal_date IN (SELECT value FROM json_each(?))
+                )
+                """,
+                (user_id, dates)
+            )
+            archive.executemany(
+                """
+                INSERT OR REPLACE INTO archived_days (user_id, meal_date, total_calories, entries)
+                VALUES (?, ?, ?, ?)
+                """,
+                days
+            )
+            archive.executemany(
+                "INSERT OR REPLACE INTO archived_log_ids (log_id, user_id, meal_date) VALUES (?, ?, ?)",
+                log_rows
+            )
+
+        copied = archive.execute(
+            "SELECT COUNT(*) FROM archived_log_ids WHERE user_id = ? AND log_id IN (SELECT value FROM json_each(?))",
+            (user_id, log_ids)
+        ).fetchone()[0]
+        if copied != len(log_rows):
+            raise RuntimeError(f"archive copy for user {user_id} has {copied} of {len(log_rows)} entries")
+
+        # Items go with their entries (ON DELETE CASCADE)
+        conn.execute("DELETE FROM user_meal_log WHERE user_id = ? AND meal_date < ?", (user_id, cutoff))
+
+        # The entries were moved, not deleted: drop the tombstones the delete
+        # just wrote, so synced clients keep them and every day and log
+        # version (the ETags and sync tokens) stays exactly as it was
+        conn.execute(
+            "DELETE FROM user_meal_log_changes WHERE user_id = ? AND id > ?",
+            (user_id, last_change)
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+    return len(days), len(log_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old meal log days into the archive database")
+    horizon = parser.add_mutually_exclusive_group()
+    horizon.add_argument(
+        "--days",
+        type=int,
+        default=365,
+        help="Archive days older than this many days (default: 365)"
+    )
+    horizon.add_argument(
+        "--before",
+        help="Archive days before this date (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--user",
+        help="Only archive this user's history"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would be archived without changing anything"
+    )
+    parser.add_argument(
+        "--busy-timeout",
+        type=int,
+        default=10000,
+        help="Milliseconds to wait for locks held by the running server (default: 10000)"
+    )
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    db_path = args.db
+    require_database(db_path)
+
+    if args.before:
+        try:
+            cutoff = date.fromisoformat(args.before).isoformat()
+        except ValueError:
+            print("Error: --before must be a date (YYYY-MM-DD)", file=sys.stderr)
+            sys.exit(1)
+    else:
+        cutoff = (pacific_today() - timedelta(days=args.days)).isoformat()
+
+    conn = connect(db_path, timeout=args.busy_timeout / 1000, isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON")
+
+    try:
+        if args.user:
+            users = conn.execute("SELECT id, username FROM users WHERE username = ?", (args.user,)).fetchall()
+            if not users:
+                print(f"Error: User '{args.user}' not found", file=sys.stderr)
+                sys.exit(1)
+        else:
+            users = conn.execute("SELECT id, username FROM users ORDER BY id").fetchall()
+
+        if args.dry_run:
+            total_days = total_entries = 0
+            for user_id, username in users:
+                days, entries = conn.execute(
+                    """
+                    SELECT COUNT(DISTINCT meal_date), COUNT(*) FROM user_meal_log
+                    WHERE user_id = ? AND meal_date < ?
+                    """,
+                    (user_id, cutoff)
+                ).fetchone()
+                if entries:
+                    print(f"  {username}: {days} days, {entries} entries")
+                total_days += days
+                total_entries += entries
+            print(f"Would archive {total_days} days ({total_entries} entries) before {cutoff}")
+            return
+
+        archive_path = archive_file(db_path)
+        create_archive(archive_path)
+        archive = sqlite3.connect(archive_path, timeout=args.busy_timeout / 1000)
+
+        total_days = total_entries = 0
+        try:
+            for user_id, username in users:
+                days, entries = archive_user(conn, archive, user_id, cutoff)
+                if entries:
+                    print(f"  {username}: {days} days, {entries} entries")
+                total_days += days
+                total_entries += entries
+        finally:
+            archive.close()
+
+        print(f"Archived {total_days} days ({total_entries} entries) before {cutoff} into {archive_path.name}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
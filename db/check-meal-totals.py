@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Check the stored total_calories/item_count of meal templates against their items."""
+
+import argparse
+import sqlite3
+import sys
+
+from dbutil import add_database_argument, connect, require_database
+
+COMPUTED_TOTALS_QUERY = """
+    SELECT
+        m.id,
+        m.name,
+        m.total_calories,
+        m.item_count,
+        COALESCE(SUM(f.calories * mi.quantity), 0) AS actual_calories,
+        COUNT(mi.id) AS actual_count
+    FROM meals m
+    LEFT JOIN meal_items mi ON mi.meal_id = m.id
+    LEFT JOIN foods f ON f.id = mi.food_id
+    GROUP BY m.id
+    ORDER BY m.name
+"""
+
+
+def find_mismatches(cursor):
+    """Return meals whose stored totals differ from their items."""
+    cursor.execute(COMPUTED_TOTALS_QUERY)
+    return [
+        row for row in cursor.fetchall()
+        if abs(row["total_calories"] - row["actual_calories"]) > 1e-6
+        or row["item_count"] != row["actual_count"]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check denormalized meal template totals")
+    parser.add_argument("--fix", action="store_true", help="Rewrite mismatched totals")
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    db_path = args.db
+    require_database(db_path)
+
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    mismatches = find_mismatches(cursor)
+
+    if not mismatches:
+        print("All meal totals are consistent")
+        conn.close()
+        return
+
+    for row in mismatches:
+        print(
+            f"{row['name']} (id {row['id']}): stored {row['total_calories']} cal / {row['item_count']} items, "
+            f"actual {row['actual_calories']} cal / {row['actual_count']} items"
+        )
+
+    if args.fix:
+        cursor.executemany(
+            "UPDATE meals SET total_calories = ?, item_count = ? WHERE id = ?",
+            [(row["actual_calories"], row["actual_count"], row["id"]) for row in mismatches]
+        )
+        conn.commit()
+        print(f"Fixed {len(mismatches)} meal(s)")
+    else:
+        print(f"{len(mismatches)} meal(s) inconsistent (run with --fix to repair)")
+
+    conn.close()
+    sys.exit(0 if args.fix else 1)
+
+
+if __name__ == "__main__":
+    main()
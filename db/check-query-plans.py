@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""Check the query plans of every SQL statement in the API server.
+
+Collects the SQL string literals in backend/api_server, runs EXPLAIN QUERY
+PLAN for each against an in-memory database built from schema.sql and
+seeded with synthetic data, and fails (exit status 1) when:
+
+  * a query does a full SCAN of a large table, or walks a whole index of
+    one (SCAN ... USING INDEX), that is not allowed below,
+  * an allowlist entry names a query that no longer exists or no longer
+    scans,
+  * a query does not use the index it is expected to use, or
+  * a plan differs from the recorded baseline in query-plans.txt.
+
+Run with --update after an intentional schema or query change to re-record
+the baseline, and review the resulting diff like any other change. With
+--db the plans come from an existing database and its own statistics
+instead; the baseline is neither compared nor written then.
+"""
+
+import argparse
+import ast
+import difflib
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+from dbutil import add_database_argument, archive_file, connect, require_database
+
+DB_DIR = Path(__file__).parent
+SCHEMA_PATH = DB_DIR / "schema.sql"
+ARCHIVE_SCHEMA_PATH = DB_DIR / "archive-schema.sql"
+BASELINE_PATH = DB_DIR / "query-plans.txt"
+SOURCE_DIR = DB_DIR.parent / "backend" / "api_server"
+
+SQL_PATTERN = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\s")
+# Plans name aliased tables by their alias ("SCAN l")
+ALIAS_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?(\w+)", re.IGNORECASE)
+SCAN_PATTERN = re.compile(r"\s*SCAN (\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX \w+)?$")
+
+# Tables that grow with users or history; scanning them is a regression
+LARGE_TABLES = {
+    "sessions",
+    "foods",
+    "meals",
+    "meal_items",
+    "user_meal_log",
+    "user_meal_log_items",
+    "user_meal_log_changes",
+    "archived_days",
+    "archived_log_ids",
+}
+
+# Queries allowed to scan a large table, with the reason
+ALLOWED_SCANS = {
+    "food_index.py:build#1": "loads the whole catalog at startup and on catalog changes",
+    # With a trigger on foods, SQLite plans the foreign key lookup for
+    # deferred violations, but skips it at run time unless one is pending
+    "routes/food_routes.py:create_food#2": "foreign key check only run with pending violations",
+}
+
+# Queries allowed to walk a whole index of a large table, with the reason.
+# Cheaper than a table scan, but still grows with the table.
+ALLOWED_INDEX_SCANS = {
+    "routes/food_routes.py:list_foods#1": "unpaginated catalog listing, kept for compatibility",
+}
+
+# Index each query must use (checked in addition to the baseline)
+EXPECTED_INDEXES = {
+    "auth.py:validate_session_token#1": "idx_sessions_token",
+    "routes/log_routes.py:build_daily_log#1": "idx_user_meal_log_user_date",
+    "routes/log_routes.py:build_daily_log#2": "idx_user_meal_log_items_log_id",
+    "routes/log_routes.py:get_available_dates#1": "idx_user_meal_log_user_date",
+    "routes/log_routes.py:get_log_dates#1": "idx_user_meal_log_user_date",
+    "routes/log_routes.py:get_log_changes#1": "idx_user_meal_log_changes_user_id",
+    "routes/log_routes.py:get_log_version#1": "idx_user_meal_log_changes_user_id",
+    "routes/log_routes.py:update_calendar#1": "idx_user_meal_log_user_date",
+    "routes/log_routes.py:get_day_version#1": "idx_user_meal_log_changes_user_date",
+    "routes/log_routes.py:iter_export_rows#1": "idx_user_meal_log_user_date",
+    "routes/meal_routes.py:get_meal_items#1": "idx_meal_items_meal_id",
+    "food_index.py:_counts_for#1": "idx_user_meal_log_user_date",
+}
+
+
+def collect_queries():
+    """Return {key: sql} for every SQL string literal in the API server.
+
+    The tests are skipped: their SQL sets up fixtures, it is not served.
+    Keys are "<file>:<enclosing function or constant>#<n>" so they stay
+    stable when unrelated code moves around.
+    """
+    queries = {}
+    for path in sorted(SOURCE_DIR.rglob("*.py")):
+        rel = path.relative_to(SOURCE_DIR).as_posix()
+        if rel.startswith("tests/"):
+            continue
+        tree = ast.parse(path.read_text(), filename=str(path))
+        counts = {}
+
+        def visit(node, scope):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                scope = node.name
+            elif scope == "<module>" and isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+                scope = node.targets[0].id
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and SQL_PATTERN.match(node.value):
+                counts[scope] = counts.get(scope, 0) + 1
+                queries[f"{rel}:{scope}#{counts[scope]}"] = " ".join(node.value.split())
+            for child in ast.iter_child_nodes(node):
+                visit(child, scope)
+
+        visit(tree, "<module>")
+    return queries
+
+
+def seed(conn):
+    """Fill the schema with enough rows for the planner to prefer indexes."""
+    conn.executemany("INSERT INTO users (username) VALUES (?)", [(f"user{i}",) for i in range(200)])
+    conn.executemany(
+        "INSERT INTO sessions (user_id, token, expires_at) VALUES (?, ?, '2999-01-01')",
+        [(i % 200 + 1, f"token{i}") for i in range(1000)]
+    )
+    conn.executemany(
+        "INSERT INTO foods (name, calories) VALUES (?, ?)",
+        [(f"food {i:04d}", i % 700) for i in range(2000)]
+    )
+    conn.executemany(
+        "INSERT INTO meals (name, description) VALUES (?, ?)",
+        [(f"meal {i:03d}", "template" if i % 2 else None) for i in range(300)]
+    )
+    conn.executemany(
+        "INSERT INTO meal_items (meal_id, food_id, quantity) VALUES (?, ?, 1)",
+        [(i % 300 + 1, i % 2000 + 1) for i in range(1500)]
+    )
+    meal_types = ["breakfast", "lunch", "dinner"]
+    conn.executemany(
+        "INSERT INTO user_meal_log (user_id, meal_date, meal_type) VALUES (?, ?, ?)",
+        [
+            (user, f"2024-{day // 28 + 1:02d}-{day % 28 + 1:02d}", meal_type)
+            for user in range(1, 201)
+            for day in range(60)
+            for meal_type in meal_types
+        ]
+    )
+    conn.execute(
+        "INSERT INTO user_meal_log_items (log_id, food_id, quantity) "
+        "SELECT id, id % 2000 + 1, 1 FROM user_meal_log"
+    )
+    conn.executemany(
+        "INSERT INTO archived_days (user_id, meal_date, total_calories, entries) VALUES (?, ?, 0, '[]')",
+        [(user, f"2023-{day // 28 + 1:02d}-{day % 28 + 1:02d}") for user in range(1, 201) for day in range(60)]
+    )
+    conn.execute(
+        "INSERT INTO archived_log_ids (user_id, meal_date) "
+        "SELECT user_id, meal_date FROM archived_days, (SELECT 1 UNION ALL SELECT 2)"
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def explain(conn, sql):
+    """Return the query plan as indented text lines."""
+    params = [None] * sql.count("?")
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def full_scans(plan, sql):
+    """Return (large tables scanned, large tables walked through a whole index)."""
+    aliases = {alias: table for table, alias in ALIAS_PATTERN.findall(sql)}
+    scanned, index_scanned = [], []
+    for line in plan:
+        match = SCAN_PATTERN.match(line)
+        if not match:
+            continue
+        table = aliases.get(match.group(1), match.group(1))
+        if table in LARGE_TABLES:
+            (index_scanned if match.group(2) else scanned).append(table)
+    return scanned, index_scanned
+
+
+def read_baseline():
+    """Parse query-plans.txt into {key: plan lines}."""
+    if not BASELINE_PATH.exists():
+        return {}
+    baseline = {}
+    key = None
+    for line in BASELINE_PATH.read_text().splitlines():
+        if line.startswith("== "):
+            key = line[3:]
+            baseline[key] = []
+        elif key and line.startswith("   "):
+            baseline[key].append(line[3:])
+    return baseline
+
+
+def write_baseline(queries, plans):
+    """Record every query and its plan in query-plans.txt."""
+    out = [
+        "# Recorded EXPLAIN QUERY PLAN output for the API server's queries.",
+        "# Regenerate with: python db/check-query-plans.py --update",
+        "",
+    ]
+    for key in sorted(plans):
+        out.append(f"== {key}")
+        out.append(f"-- {queries[key]}")
+        out.extend(f"   {line}" for line in plans[key])
+        out.append("")
+    BASELINE_PATH.write_text("\n".join(out))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check API query plans for index regressions")
+    parser.add_argument("--update", action="store_true", help="Re-record query-plans.txt")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print every plan")
+    add_database_argument(
+        parser,
+        default=None,
+        help="Explain against this database file or file: URI instead of a seeded in-memory one "
+             "(default: $MEAL_TRACKER_DB)"
+    )
+    args = parser.parse_args()
+
+    if args.db:
+        require_database(args.db)
+        conn = connect(args.db, read_only=True)
+        archive_path = archive_file(args.db)
+        if archive_path.exists():
+            conn.execute("ATTACH DATABASE ? AS archive", (f"{archive_path.resolve().as_uri()}?mode=ro",))
+        else:
+            conn.execute("ATTACH DATABASE ':memory:' AS archive")
+            conn.executescript(ARCHIVE_SCHEMA_PATH.read_text().replace("EXISTS ", "EXISTS archive."))
+    else:
+        conn = sqlite3.connect(":memory:")
+        conn.executescript(SCHEMA_PATH.read_text())
+        # The server queries the archive on its own connection with
+        # unqualified table names, so one database with both schemas
+        # plans the same
+        conn.executescript(ARCHIVE_SCHEMA_PATH.read_text())
+        seed(conn)
+
+    queries = collect_queries()
+    plans = {}
+    failures = []
+
+    for key, sql in queries.items():
+        try:
+            plans[key] = explain(conn, sql)
+        except sqlite3.Error as e:
+            failures.append(f"{key}: cannot explain: {e}")
+            continue
+
+        if args.verbose:
+            print(f"{key}\n  {sql}")
+            print("\n".join(f"    {line}" for line in plans[key]))
+
+        scanned, index_scanned = full_scans(plans[key], sql)
+        if scanned and key not in ALLOWED_SCANS:
+            failures.append(f"{key}: full scan of {', '.join(scanned)}")
+        if index_scanned and key not in ALLOWED_INDEX_SCANS:
+            failures.append(f"{key}: full index scan of {', '.join(index_scanned)}")
+
+        # Plans of a real database follow its statistics, so only the
+        # seeded one can tell that an allowed scan went away
+        if not args.db:
+            if key in ALLOWED_SCANS and not scanned:
+                failures.append(f"{key}: listed in ALLOWED_SCANS but no longer scans a large table")
+            if key in ALLOWED_INDEX_SCANS and not index_scanned:
+                failures.append(f"{key}: listed in ALLOWED_INDEX_SCANS but no longer scans an index")
+
+        expected = EXPECTED_INDEXES.get(key)
+        if expected and not any(expected in line for line in plans[key]):
+            failures.append(f"{key}: expected to use {expected}")
+
+    for name, listed in [
+        ("ALLOWED_SCANS", ALLOWED_SCANS),
+        ("ALLOWED_INDEX_SCANS", ALLOWED_INDEX_SCANS),
+        ("EXPECTED_INDEXES", EXPECTED_INDEXES),
+    ]:
+        for key in sorted(set(listed) - set(queries)):
+            failures.append(f"{key}: listed in {name} but no such query was found")
+
+    # The baseline describes the seeded database only, so --db skips it
+    if args.update and not args.db:
+        write_baseline(queries, plans)
+        print(f"Recorded {len(plans)} query plans in {BASELINE_PATH.name}")
+    elif not args.db:
+        baseline = read_baseline()
+        for key in sorted(set(plans) | set(baseline)):
+            if key not in baseline:
+                failures.append(f"{key}: new query without a recorded plan (run with --update)")
+            elif key not in plans:
+                failures.append(f"{key}: recorded plan for a query that no longer exists (run with --update)")
+            elif plans[key] != baseline[key]:
+                diff = difflib.unified_diff(baseline[key], plans[key], "recorded", "current", lineterm="")
+                failures.append(f"{key}: plan changed\n" + "\n".join(f"    {line}" for line in diff))
+
+    if failures:
+        print(f"{len(failures)} query plan problem(s):", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{len(plans)} query plans OK")
+
+
+if __name__ == "__main__":
+    main()
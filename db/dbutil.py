@@ -0,0 +1,93 @@
+"""Shared helpers for the scripts in this directory.
+
+A database target is a file path or a file: URI, like the API server's
+--db. In-memory databases (":memory:", vfs=memdb, mode=memory) are
+rejected: they are private to the process that created them, so a
+separate script would only ever see a new, empty one.
+
+Dates follow the API server's Pacific Time day (see pacific_today).
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+from zoneinfo import ZoneInfo
+
+DATABASE_ENV = "MEAL_TRACKER_DB"
+DEFAULT_DATABASE = Path(__file__).parent / "meals.db"
+
+# The API server's "today" (routes/log_routes.py get_pacific_today)
+PACIFIC_TZ = ZoneInfo("America/Los_Angeles")
+
+
+def pacific_today() -> date:
+    """Get today's date in Pacific Time, as the API server does."""
+    return datetime.now(PACIFIC_TZ).date()
+
+
+def database_target(value: str) -> str:
+    """argparse type for --db: accept a path or file: URI, reject in-memory ones."""
+    value = str(value)
+    memory = value == ":memory:"
+    if value.startswith("file:"):
+        parts = urlsplit(value)
+        query = dict(parse_qsl(parts.query))
+        memory = parts.path in ("", ":memory:") or query.get("vfs") == "memdb" or query.get("mode") == "memory"
+    if memory:
+        raise argparse.ArgumentTypeError(
+            f"{value} is an in-memory database, which only the process that created it "
+            "can see; pass a database file or a file: URI"
+        )
+    return value
+
+
+def add_database_argument(parser: argparse.ArgumentParser, default: Path | None = DEFAULT_DATABASE,
+                          help: str | None = None) -> None:
+    """Add the --db option, defaulting to $MEAL_TRACKER_DB, then `default`."""
+    parser.add_argument(
+        "--db",
+        type=database_target,
+        default=os.environ.get(DATABASE_ENV, None if default is None else str(default)),
+        help=help or f"Database file or file: URI (default: ${DATABASE_ENV} or db/meals.db)"
+    )
+
+
+def database_file(target: str) -> Path:
+    """The file behind a database target."""
+    if target.startswith("file:"):
+        return Path(unquote(urlsplit(target).path))
+    return Path(target)
+
+
+def archive_file(target: str) -> Path:
+    """meals.db -> meals-archive.db, as the API server expects."""
+    path = database_file(target)
+    return path.with_name(f"{path.stem}-archive{path.suffix}")
+
+
+def require_database(target: str) -> None:
+    """Exit with an error if the target's database file does not exist."""
+    if not database_file(target).exists():
+        print(f"Error: Database not found at {target}", file=sys.stderr)
+        sys.exit(1)
+
+
+def connect(target: str, read_only: bool = False, **kwargs) -> sqlite3.Connection:
+    """Open a database target; read_only opens it with mode=ro.
+
+    Extra keyword arguments go to sqlite3.connect (timeout, isolation_level).
+    """
+    if not target.startswith("file:"):
+        if not read_only:
+            return sqlite3.connect(target, **kwargs)
+        target = Path(target).resolve().as_uri()
+
+    if read_only:
+        base, _, query = target.partition("?")
+        params = [(k, v) for k, v in parse_qsl(query) if k != "mode"] + [("mode", "ro")]
+        target = f"{base}?{urlencode(params)}"
+    return sqlite3.connect(target, uri=True, **kwargs)
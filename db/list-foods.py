@@ -1,20 +1,22 @@
 #!/usr/bin/env python3
 """Print all foods from the database in CSV format."""
 
+import argparse
 import csv
-import sqlite3
 import sys
-from pathlib import Path
+
+from dbutil import add_database_argument, connect, require_database
 
 
 def main():
-    db_path = Path(__file__).parent / "meals.db"
+    parser = argparse.ArgumentParser(description="Print all foods as CSV")
+    add_database_argument(parser)
+    args = parser.parse_args()
 
-    if not db_path.exists():
-        print(f"Error: Database not found at {db_path}", file=sys.stderr)
-        sys.exit(1)
+    db_path = args.db
+    require_database(db_path)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     cursor = conn.cursor()
     cursor.execute("SELECT id, name, calories, created_at FROM foods ORDER BY name")
     rows = cursor.fetchall()
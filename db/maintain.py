@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Run routine maintenance on the meals database.
+
+Runs integrity checks, incremental vacuum, statistics refresh and a WAL
+checkpoint, and reports file size, page counts and row counts before and
+after. Everything except --enable-incremental-vacuum is safe while the API
+server is running: each step takes its locks briefly and waits (up to
+--busy-timeout) for writers instead of failing.
+"""
+
+import argparse
+import sqlite3
+import sys
+
+from dbutil import add_database_argument, connect, database_file, require_database
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+def file_size(db_path):
+    """Size of the database plus its WAL file, in bytes."""
+    wal_path = db_path.with_name(db_path.name + "-wal")
+    size = db_path.stat().st_size
+    if wal_path.exists():
+        size += wal_path.stat().st_size
+    return size
+
+
+def collect_stats(conn, db_path):
+    """Gather size, page and row count statistics."""
+    tables = [
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    ]
+    return {
+        "file_size": file_size(db_path),
+        "page_size": conn.execute("PRAGMA page_size").fetchone()[0],
+        "page_count": conn.execute("PRAGMA page_count").fetchone()[0],
+        "freelist_count": conn.execute("PRAGMA freelist_count").fetchone()[0],
+        "rows": {
+            table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            for table in tables
+        },
+    }
+
+
+def print_report(before, after):
+    """Print before/after statistics side by side."""
+    print(f"{'':<28} {'before':>12} {'after':>12}")
+    print("-" * 54)
+    for key, label in [
+        ("file_size", "File size (bytes)"),
+        ("page_count", "Pages"),
+        ("freelist_count", "Free pages"),
+    ]:
+        print(f"{label:<28} {before[key]:>12} {after[key]:>12}")
+    print(f"{'Page size (bytes)':<28} {before['page_size']:>12} {after['page_size']:>12}")
+    print()
+    print(f"{'Table':<28} {'rows before':>12} {'rows after':>12}")
+    print("-" * 54)
+    for table in sorted(set(before["rows"]) | set(after["rows"])):
+        print(f"{table:<28} {before['rows'].get(table, 0):>12} {after['rows'].get(table, 0):>12}")
+
+
+def check_integrity(conn, full):
+    """Run quick_check or integrity_check plus a foreign key check."""
+    pragma = "integrity_check" if full else "quick_check"
+    problems = [row[0] for row in conn.execute(f"PRAGMA {pragma}") if row[0] != "ok"]
+    problems += [
+        f"foreign key violation: {row[0]} rowid {row[1]} -> {row[2]}"
+        for row in conn.execute("PRAGMA foreign_key_check")
+    ]
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vacuum, analyze, checkpoint and check the meals database")
+    parser.add_argument(
+        "--check",
+        choices=["quick", "full", "none"],
+        default="quick",
+        help="Integrity check to run (default: quick)"
+    )
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="Run a full ANALYZE instead of PRAGMA optimize"
+    )
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="Convert the database to incremental auto-vacuum (runs a full VACUUM; stop the API server first)"
+    )
+    parser.add_argument(
+        "--busy-timeout",
+        type=int,
+        default=10000,
+        help="Milliseconds to wait for locks held by the running server (default: 10000)"
+    )
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    db_path = args.db
+    require_database(db_path)
+
+    conn = connect(db_path, timeout=args.busy_timeout / 1000, isolation_level=None)
+    failed = False
+
+    try:
+        before = collect_stats(conn, database_file(db_path))
+
+        if args.check != "none":
+            print(f"Running {args.check} integrity check...")
+            problems = check_integrity(conn, args.check == "full")
+            if problems:
+                failed = True
+                for problem in problems:
+                    print(f"  {problem}", file=sys.stderr)
+            else:
+                print("  ok")
+
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if args.enable_incremental_vacuum and auto_vacuum != 2:
+            print("Converting to incremental auto-vacuum (full VACUUM)...")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            auto_vacuum = 2
+
+        if auto_vacuum == 2:
+            print(f"Reclaiming {before['freelist_count']} free pages (incremental vacuum)...")
+            # incremental_vacuum frees one page per step; executescript steps
+            # it to completion where execute() would stop after the first
+            conn.executescript("PRAGMA incremental_vacuum;")
+        else:
+            print(
+                f"Skipping vacuum: auto_vacuum is '{AUTO_VACUUM_MODES[auto_vacuum]}' "
+                "(use --enable-incremental-vacuum once to convert)"
+            )
+
+        if args.analyze:
+            print("Running ANALYZE...")
+            conn.execute("ANALYZE")
+        else:
+            print("Running PRAGMA optimize...")
+            conn.execute("PRAGMA optimize")
+
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            busy, wal_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            if busy:
+                print(f"WAL checkpoint partial: {checkpointed}/{wal_frames} frames (readers still active)")
+            else:
+                print(f"WAL checkpoint complete: {checkpointed} frames")
+
+        after = collect_stats(conn, database_file(db_path))
+    except sqlite3.OperationalError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    print()
+    print_report(before, after)
+
+    if failed:
+        print("\nIntegrity check failed", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,11 @@
 """Print meal history for a specified user."""
 
 import argparse
+import json
 import sqlite3
 import sys
-from pathlib import Path
+
+from dbutil import add_database_argument, archive_file, connect, require_database
 
 MEAL_TYPE_ORDER = [
     'breakfast',
@@ -63,6 +65,44 @@ def get_meal_items(cursor, log_id):
     return cursor.fetchall()
 
 
+def get_archived_history(archive_path, user_id):
+    """Get a user's days moved to the archive by archive.py, as log dicts with items."""
+    if not archive_path.exists():
+        return []
+
+    conn = sqlite3.connect(archive_path)
+    try:
+        days = conn.execute(
+            "SELECT meal_date, entries FROM archived_days WHERE user_id = ?",
+            (user_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    logs = []
+    for meal_date, entries in days:
+        for entry in json.loads(entries):
+            logs.append({
+                'id': entry['id'],
+                'meal_date': meal_date,
+                'meal_type': entry['meal_type'],
+                'meal_name': entry['meal_name'],
+                'items': sorted(
+                    ({'name': i['food_name'], 'calories': i['calories'], 'quantity': i['quantity']}
+                     for i in entry['items']),
+                    key=lambda i: i['name']
+                )
+            })
+    return logs
+
+
+def get_log_items(cursor, log):
+    """Get a log's items, already included for archived logs."""
+    if 'items' in log:
+        return log['items']
+    return get_meal_items(cursor, log['id'])
+
+
 def format_date(date_str):
     """Format date string for display."""
     from datetime import datetime
@@ -89,15 +129,13 @@ def main():
         action="store_true",
         help="Output in CSV format"
     )
+    add_database_argument(parser)
     args = parser.parse_args()
 
-    db_path = Path(__file__).parent / "meals.db"
-
-    if not db_path.exists():
-        print(f"Error: Database not found at {db_path}", file=sys.stderr)
-        sys.exit(1)
+    db_path = args.db
+    require_database(db_path)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
@@ -108,8 +146,16 @@ def main():
         conn.close()
         sys.exit(1)
 
-    # Get meal history
-    logs = get_meal_history(cursor, user_id)
+    # Get meal history, including days moved to the archive
+    logs = [dict(log) for log in get_meal_history(cursor, user_id)]
+    hot_dates = {log['meal_date'] for log in logs}
+    archive_path = archive_file(db_path)
+    logs += [
+        log for log in get_archived_history(archive_path, user_id)
+        if log['meal_date'] not in hot_dates
+    ]
+    logs.sort(key=lambda log: log['meal_type'])
+    logs.sort(key=lambda log: log['meal_date'], reverse=True)
 
     if not logs:
         print(f"No meal history found for user '{args.username}'")
@@ -129,7 +175,7 @@ def main():
         writer.writerow(["date", "meal_type", "meal_name", "food_name", "calories", "quantity", "total_calories"])
 
         for log in logs:
-            items = get_meal_items(cursor, log['id'])
+            items = get_log_items(cursor, log)
             if items:
                 for item in items:
                     total_cal = int(item['calories'] * item['quantity'])
@@ -173,7 +219,7 @@ def main():
                 print("-" * 60)
 
             # Get items for this meal
-            items = get_meal_items(cursor, log['id'])
+            items = get_log_items(cursor, log)
             meal_calories = sum(int(i['calories'] * i['quantity']) for i in items)
             daily_total += meal_calories
 
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Compute per-user meal statistics for every user in the database.
+
+Users are split into chunks that a process pool works through in parallel.
+Each worker opens its own read-only connection and answers a whole chunk
+with two set-based queries (daily totals and food counts), so the run scales
+with cores and never takes a write lock on the live database. Days moved
+out by archive.py are read from the archive database and count like any
+other day; a day present in both (an interrupted move) counts once.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+from multiprocessing import Pool
+
+from dbutil import add_database_argument, archive_file, connect, pacific_today, require_database
+
+REPORT_COLUMNS = [
+    "user_id",
+    "username",
+    "days_logged",
+    "first_date",
+    "last_date",
+    "avg_daily_calories",
+    "longest_streak",
+    "current_streak",
+    "top_foods",
+]
+
+DAILY_TOTALS_QUERY = """
+    SELECT l.user_id, l.meal_date, COALESCE(SUM(f.calories * li.quantity), 0) AS calories
+    FROM user_meal_log l
+    LEFT JOIN user_meal_log_items li ON li.log_id = l.id
+    LEFT JOIN foods f ON f.id = li.food_id
+    WHERE l.user_id IN (SELECT value FROM json_each(?))
+    GROUP BY l.user_id, l.meal_date
+    ORDER BY l.user_id, l.meal_date
+"""
+
+FOOD_COUNTS_QUERY = """
+    SELECT l.user_id, li.food_id, f.name, COUNT(*) AS times
+    FROM user_meal_log l
+    JOIN user_meal_log_items li ON li.log_id = l.id
+    JOIN foods f ON f.id = li.food_id
+    WHERE l.user_id IN (SELECT value FROM json_each(?))
+    GROUP BY l.user_id, li.food_id
+"""
+
+ARCHIVED_DAYS_QUERY = """
+    SELECT user_id, meal_date, total_calories AS calories
+    FROM archived_days
+    WHERE user_id IN (SELECT value FROM json_each(?))
+"""
+
+# Item counts per archived day, so days also present in the main
+# database can be left out
+ARCHIVED_FOOD_COUNTS_QUERY = """
+    SELECT d.user_id, d.meal_date,
+           json_extract(item.value, '$.food_id') AS food_id,
+           json_extract(item.value, '$.food_name') AS name,
+           COUNT(*) AS times
+    FROM archived_days d, json_each(d.entries) entry, json_each(entry.value, '$.items') item
+    WHERE d.user_id IN (SELECT value FROM json_each(?))
+    GROUP BY d.user_id, d.meal_date, food_id
+"""
+
+
+def connect_readonly(db_path):
+    """Open a read-only connection that waits out the server's writers."""
+    conn = connect(db_path, read_only=True, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def streaks(dates, today):
+    """Return (longest, current) runs of consecutive logged days.
+
+    The current streak counts back from today, or from yesterday if today
+    has not been logged yet.
+    """
+    longest = run = 0
+    previous = None
+    for day in dates:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+
+    current = 0
+    if dates and dates[-1] >= today - timedelta(days=1):
+        current = run
+    return longest, current
+
+
+def add_food_count(counts, row):
+    """Add a food count row to counts[user_id][food_id] = [name, times]."""
+    food = counts.setdefault(row["user_id"], {}).setdefault(row["food_id"], [row["name"], 0])
+    food[1] += row["times"]
+
+
+def report_chunk(task):
+    """Worker: compute report rows for one chunk of (user_id, username)."""
+    db_path, users, top_n, today = task
+    user_ids = json.dumps([user_id for user_id, _ in users])
+
+    daily = {}
+    food_counts = {}
+    conn = connect_readonly(db_path)
+    try:
+        for row in conn.execute(DAILY_TOTALS_QUERY, (user_ids,)):
+            daily.setdefault(row["user_id"], {})[row["meal_date"]] = row["calories"]
+        for row in conn.execute(FOOD_COUNTS_QUERY, (user_ids,)):
+            add_food_count(food_counts, row)
+    finally:
+        conn.close()
+
+    archive_path = archive_file(db_path)
+    if archive_path.exists():
+        conn = connect_readonly(str(archive_path))
+        try:
+            archived = set()
+            for row in conn.execute(ARCHIVED_DAYS_QUERY, (user_ids,)):
+                days = daily.setdefault(row["user_id"], {})
+                if row["meal_date"] not in days:
+                    days[row["meal_date"]] = row["calories"]
+                    archived.add((row["user_id"], row["meal_date"]))
+            for row in conn.execute(ARCHIVED_FOOD_COUNTS_QUERY, (user_ids,)):
+                if (row["user_id"], row["meal_date"]) in archived:
+                    add_food_count(food_counts, row)
+        finally:
+            conn.close()
+
+    rows = []
+    for user_id, username in users:
+        days = sorted(
+            (date.fromisoformat(meal_date), calories)
+            for meal_date, calories in daily.get(user_id, {}).items()
+        )
+        top_foods = sorted(food_counts.get(user_id, {}).values(), key=lambda food: (-food[1], food[0]))
+        dates = [day for day, _ in days]
+        longest, current = streaks(dates, today)
+        rows.append({
+            "user_id": user_id,
+            "username": username,
+            "days_logged": len(days),
+            "first_date": dates[0].isoformat() if dates else "",
+            "last_date": dates[-1].isoformat() if dates else "",
+            "avg_daily_calories": round(sum(cal for _, cal in days) / len(days), 1) if days else 0,
+            "longest_streak": longest,
+            "current_streak": current,
+            "top_foods": "; ".join(f"{name} ({times})" for name, times in top_foods[:top_n]),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute per-user meal statistics in parallel")
+    parser.add_argument(
+        "--output", "-o",
+        help="Write the report to this file (default: stdout)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "ndjson"],
+        default="csv",
+        help="Report format (default: csv)"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=200,
+        help="Users per worker task (default: 200)"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help="Number of top foods per user (default: 5)"
+    )
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    db_path = args.db
+    require_database(db_path)
+
+    conn = connect_readonly(db_path)
+    users = [(row["id"], row["username"]) for row in conn.execute("SELECT id, username FROM users ORDER BY id")]
+    conn.close()
+
+    # Streaks end on the server's day, not the machine's
+    today = pacific_today()
+    tasks = [
+        (db_path, users[i:i + args.chunk_size], args.top, today)
+        for i in range(0, len(users), args.chunk_size)
+    ]
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            writer = csv.DictWriter(out, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            write_row = writer.writerow
+        else:
+            def write_row(row):
+                out.write(json.dumps(row) + "\n")
+
+        with Pool(processes=max(1, min(args.workers, len(tasks)))) as pool:
+            for rows in pool.imap(report_chunk, tasks):
+                for row in rows:
+                    write_row(row)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.output:
+        print(f"Wrote report for {len(users)} user(s) to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
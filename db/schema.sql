@@ -1,10 +1,16 @@
 PRAGMA foreign_keys = ON;
 
+-- Let db/maintain.py return free pages to the OS without a full VACUUM.
+-- Only takes effect before the first table is created.
+PRAGMA auto_vacuum = INCREMENTAL;
+
 -- Users table
 CREATE TABLE users (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     username        TEXT NOT NULL UNIQUE,
-    created_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now'))
+    created_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    -- Bumped on logout; signed session tokens carrying an older value are rejected
+    session_generation INTEGER NOT NULL DEFAULT 0
 );
 
 -- Session tokens for "remember me" functionality
@@ -25,21 +31,31 @@ CREATE TABLE foods (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     name            TEXT NOT NULL UNIQUE,
     calories        INTEGER NOT NULL,
-    created_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now'))
+    created_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    -- Bumped by foods_row_version when the name or calories change
+    version         INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE INDEX idx_foods_name ON foods(name);
 
 -- Meals table (global templates, shared across all users)
 -- Only meals with a name are stored here for reuse
+-- total_calories and item_count are denormalized from meal_items; they are
+-- written by the API when a meal is created and kept current by the
+-- foods_calories_update trigger (check with db/check-meal-totals.py)
 CREATE TABLE meals (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     name            TEXT NOT NULL UNIQUE,
     description     TEXT,
-    created_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now'))
+    created_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    total_calories  REAL NOT NULL DEFAULT 0,
+    item_count      INTEGER NOT NULL DEFAULT 0,
+    -- Bumped by meals_row_version when the name changes
+    version         INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE INDEX idx_meals_name ON meals(name);
+CREATE INDEX idx_meals_total_calories ON meals(total_calories, name);
 
 -- Meal items: foods that make up a meal template
 CREATE TABLE meal_items (
@@ -54,6 +70,56 @@ CREATE TABLE meal_items (
 CREATE INDEX idx_meal_items_meal_id ON meal_items(meal_id);
 CREATE INDEX idx_meal_items_food_id ON meal_items(food_id);
 
+-- Keep meal totals current when a food's calorie count is edited
+CREATE TRIGGER foods_calories_update AFTER UPDATE OF calories ON foods
+BEGIN
+    UPDATE meals SET total_calories = COALESCE((
+        SELECT SUM(f.calories * mi.quantity)
+        FROM meal_items mi
+        JOIN foods f ON f.id = mi.food_id
+        WHERE mi.meal_id = meals.id
+    ), 0)
+    WHERE id IN (SELECT meal_id FROM meal_items WHERE food_id = NEW.id);
+END;
+
+-- Change counter for the foods catalog, bumped by the triggers below so
+-- the in-process food index notices catalog edits, including ones made by
+-- other processes (db/add-food.py)
+CREATE TABLE catalog_versions (
+    name            TEXT PRIMARY KEY,
+    version         INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO catalog_versions (name) VALUES ('foods');
+
+CREATE TRIGGER foods_insert_version AFTER INSERT ON foods
+BEGIN
+    UPDATE catalog_versions SET version = version + 1 WHERE name = 'foods';
+END;
+
+CREATE TRIGGER foods_update_version AFTER UPDATE OF name, calories ON foods
+BEGIN
+    UPDATE catalog_versions SET version = version + 1 WHERE name = 'foods';
+END;
+
+CREATE TRIGGER foods_delete_version AFTER DELETE ON foods
+BEGIN
+    UPDATE catalog_versions SET version = version + 1 WHERE name = 'foods';
+END;
+
+-- Per-row versions of what a logged day shows (food names and calories,
+-- meal names), summed into that day's ETag. New rows and meal total
+-- updates leave existing days alone.
+CREATE TRIGGER foods_row_version AFTER UPDATE OF name, calories ON foods
+BEGIN
+    UPDATE foods SET version = version + 1 WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER meals_row_version AFTER UPDATE OF name ON meals
+BEGIN
+    UPDATE meals SET version = version + 1 WHERE id = NEW.id;
+END;
+
 -- User daily meal log
 -- Tracks what each user ate for each meal type on each day
 -- meal_type: 'breakfast', 'morning_snack', 'lunch', 'afternoon_snack', 'dinner', 'evening_snack'
@@ -84,3 +150,40 @@ CREATE TABLE user_meal_log_items (
 );
 
 CREATE INDEX idx_user_meal_log_items_log_id ON user_meal_log_items(log_id);
+
+-- Change log for delta sync: one row per create, update or delete of a
+-- user_meal_log entry, written by the triggers below. The row id is the
+-- sync token handed to clients by GET /api/log/changes.
+CREATE TABLE user_meal_log_changes (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id         INTEGER NOT NULL,
+    log_id          INTEGER NOT NULL,
+    meal_date       TEXT NOT NULL,
+    meal_type       TEXT NOT NULL,
+    op              TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+    changed_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now'))
+);
+
+CREATE INDEX idx_user_meal_log_changes_user_id ON user_meal_log_changes(user_id, id);
+CREATE INDEX idx_user_meal_log_changes_user_date ON user_meal_log_changes(user_id, meal_date, id);
+
+CREATE TRIGGER user_meal_log_insert_change AFTER INSERT ON user_meal_log
+BEGIN
+    INSERT INTO user_meal_log_changes (user_id, log_id, meal_date, meal_type, op)
+    VALUES (NEW.user_id, NEW.id, NEW.meal_date, NEW.meal_type, 'upsert');
+END;
+
+CREATE TRIGGER user_meal_log_update_change AFTER UPDATE ON user_meal_log
+BEGIN
+    INSERT INTO user_meal_log_changes (user_id, log_id, meal_date, meal_type, op)
+    VALUES (NEW.user_id, NEW.id, NEW.meal_date, NEW.meal_type, 'upsert');
+END;
+
+CREATE TRIGGER user_meal_log_delete_change AFTER DELETE ON user_meal_log
+BEGIN
+    INSERT INTO user_meal_log_changes (user_id, log_id, meal_date, meal_type, op)
+    VALUES (OLD.user_id, OLD.id, OLD.meal_date, OLD.meal_type, 'delete');
+END;
+
+-- Schema version; must match len(MIGRATIONS) in backend/api_server/database.py
+PRAGMA user_version = 7;
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useSearchParams } from 'react-router-dom';
 import { Layout } from '../components/layout/Layout';
 import { MealCard } from '../components/meals/MealCard';
@@ -50,6 +50,31 @@ export function DashboardPage() {
       .finally(() => setLoading(false));
   }, [selectedDate]);
 
+  // The change stream outlives date navigation, so it reads the current
+  // date through a ref instead of reopening on every change
+  const selectedDateRef = useRef(selectedDate);
+  useEffect(() => {
+    selectedDateRef.current = selectedDate;
+  }, [selectedDate]);
+
+  // Refresh when the log is changed from another device
+  useEffect(() => {
+    return log.subscribe((dates) => {
+      log.getDates()
+        .then((data) => setAvailableDates(data.dates))
+        .catch(() => {});
+      const date = selectedDateRef.current;
+      if (dates === null || dates.includes(date)) {
+        log.getDaily(date)
+          .then((data) => {
+            // Drop the refresh if the user moved to another day meanwhile
+            if (selectedDateRef.current === date) setDailyLog(data);
+          })
+          .catch(() => {});
+      }
+    });
+  }, []);
+
   const formatDate = (dateStr: string) => {
     const date = new Date(dateStr + 'T00:00:00');
     return date.toLocaleDateString('en-US', {
@@ -1,4 +1,4 @@
-import type { User, Food, MealTemplate, DailyLog, LogEntry } from '../types';
+import type { User, Food, MealTemplate, DailyLog, LogEntry, Bootstrap } from '../types';
 
 const API_BASE = '/api';
 
@@ -90,4 +90,26 @@ export const log = {
 
   delete: (id: number) =>
     request<{ success: boolean }>(`/log/${id}`, { method: 'DELETE' }),
+
+  // Live updates from other devices: onChange gets the changed dates, or
+  // null when everything should be refetched. Returns an unsubscribe function.
+  subscribe: (onChange: (dates: string[] | null) => void) => {
+    const source = new EventSource(`${API_BASE}/log/stream`, { withCredentials: true });
+    source.addEventListener('log', (event) => {
+      onChange(JSON.parse((event as MessageEvent).data).dates);
+    });
+    source.addEventListener('resync', () => onChange(null));
+    return () => source.close();
+  },
+};
+
+// App startup: user, foods, meals, the day's log and logged dates in one call.
+// Pass the versions from a previous response to skip unchanged foods/meals.
+export const bootstrap = {
+  get: (date: string, versions: { foods?: string; meals?: string } = {}) => {
+    const params = new URLSearchParams({ date });
+    if (versions.foods) params.set('foods_version', versions.foods);
+    if (versions.meals) params.set('meals_version', versions.meals);
+    return request<Bootstrap>(`/bootstrap?${params}`);
+  },
 };
@@ -56,6 +56,20 @@ export interface LogEntry {
   total_calories: number;
 }
 
+export interface VersionedSection<T> {
+  version: string;
+  items?: T[];
+  unchanged?: boolean;
+}
+
+export interface Bootstrap {
+  user: User;
+  foods: VersionedSection<Food>;
+  meals: VersionedSection<MealTemplate>;
+  log: DailyLog;
+  dates: string[];
+}
+
 export const MEAL_TYPES: MealType[] = [
   'breakfast',
   'morning_snack',
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Time the API's read endpoints against a seeded in-memory database.
+
+Requests go through Flask's test client, so the numbers cover routing,
+queries and serialization without network noise. Each endpoint is timed
+with orjson (when installed) and with the stdlib JSON fallback. Daily
+log requests walk through the seeded days with the day cache emptied
+before each one, so they time the queries; --cached times cache hits
+instead:
+
+    python scripts/bench-api.py
+    python scripts/bench-api.py --foods 20000 --path /api/foods --path /api/meals
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api_server"))
+
+import database  # noqa: E402
+import json_provider  # noqa: E402
+from meals import create_app  # noqa: E402
+from routes import log_routes  # noqa: E402
+from routes.meal_routes import refresh_meal_totals  # noqa: E402
+
+# "{date}" is replaced by each seeded day in turn
+DEFAULT_PATHS = [
+    "/api/foods",
+    "/api/meals",
+    "/api/meals?sort=calories&limit=50",
+    "/api/log?date={date}",
+    "/api/log/dates",
+    "/api/bootstrap?date=2024-01-15",
+]
+MEAL_TYPES = ["breakfast", "lunch", "dinner"]
+
+
+def seed_date(day: int) -> str:
+    return f"{2024 + day // 336}-{day // 28 % 12 + 1:02d}-{day % 28 + 1:02d}"
+
+
+def seed(foods: int, meals: int, days: int) -> None:
+    """Fill the database with a catalog, meal templates and one user's log."""
+    conn = database.get_db()
+    try:
+        conn.executemany(
+            "INSERT INTO foods (name, calories) VALUES (?, ?)",
+            [(f"food {i:05d}", i * 37 % 700) for i in range(foods)]
+        )
+        for m in range(meals):
+            meal_id = conn.execute(
+                "INSERT INTO meals (name, description) VALUES (?, ?)",
+                (f"meal {m:04d}", "template")
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO meal_items (meal_id, food_id, quantity) VALUES (?, ?, 1)",
+                [(meal_id, (m * 5 + k) % foods + 1) for k in range(5)]
+            )
+            refresh_meal_totals(conn, meal_id)
+        user_id = conn.execute("SELECT id FROM users WHERE username = 'bench'").fetchone()["id"]
+        for day in range(days):
+            meal_date = seed_date(day)
+            for meal_type in MEAL_TYPES:
+                log_id = conn.execute(
+                    "INSERT INTO user_meal_log (user_id, meal_date, meal_type) VALUES (?, ?, ?)",
+                    (user_id, meal_date, meal_type)
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO user_meal_log_items (log_id, food_id, quantity) VALUES (?, ?, 1)",
+                    [(log_id, (log_id * 3 + k) % foods + 1) for k in range(3)]
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def time_path(client, path: str, days: int, runs: int, requests: int, cached: bool) -> tuple[float, int]:
+    """Best-of-runs milliseconds per request, and the first response's size."""
+    paths = [path.format(date=seed_date(day)) for day in range(days)] if "{date}" in path else [path]
+    # Also keeps a payload serialized by the previous JSON provider from being served
+    log_routes.day_cache.clear()
+    response = client.get(paths[0])
+    if response.status_code != 200:
+        raise SystemExit(f"{paths[0]}: HTTP {response.status_code}")
+    best = float("inf")
+    for _ in range(runs):
+        elapsed = 0.0
+        for i in range(requests):
+            if not cached:
+                log_routes.day_cache.clear()
+            started = time.perf_counter()
+            client.get(paths[i % len(paths)])
+            elapsed += time.perf_counter() - started
+        best = min(best, elapsed / requests * 1000)
+    return best, len(response.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API read endpoints on an in-memory database")
+    parser.add_argument("--foods", type=int, default=5000, help="Foods in the catalog (default: 5000)")
+    parser.add_argument("--meals", type=int, default=200, help="Meal templates (default: 200)")
+    parser.add_argument("--days", type=int, default=365, help="Logged days for the benchmark user (default: 365)")
+    parser.add_argument("--runs", type=int, default=7, help="Timed runs per endpoint; the best is reported (default: 7)")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per run (default: 20)")
+    parser.add_argument("--cached", action="store_true", help="Keep the daily log cache between requests")
+    parser.add_argument(
+        "--path",
+        action="append",
+        help="Endpoint to time (repeatable; default: foods, meals by name and by calories, "
+             "daily logs, dates, bootstrap)"
+    )
+    args = parser.parse_args()
+
+    # Compression is off so the numbers measure the JSON work
+    app = create_app({"DATABASE": database.MEMORY_DATABASE, "COMPRESS_ENABLED": False})
+    client = app.test_client()
+    client.post("/api/auth/register", json={"username": "bench"})
+    seed(args.foods, args.meals, args.days)
+
+    providers = [("orjson", json_provider.orjson), ("stdlib", None)] if json_provider.orjson else [("stdlib", None)]
+
+    print(f"{'endpoint':<36} {'json':<8} {'ms/request':>10} {'bytes':>10}")
+    for path in args.path or DEFAULT_PATHS:
+        for label, module in providers:
+            json_provider.orjson = module
+            ms, size = time_path(client, path, max(1, args.days), args.runs, args.requests, args.cached)
+            print(f"{path:<36} {label:<8} {ms:>10.2f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()